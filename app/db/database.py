@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from collections import deque
 import mysql.connector
 from mysql.connector import Error
 from dotenv import load_dotenv
@@ -7,36 +10,415 @@ from dotenv import load_dotenv
 env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), '.env')
 load_dotenv(env_path)
 
-def get_connection():
-    # returns a raw MySQL connection
+
+def _env_int(name, default):
     try:
-        conn = mysql.connector.connect(
-            host=os.environ.get("MYSQL_HOST"),
-            user=os.environ.get("MYSQL_USER"),
-            password=os.environ.get("MYSQL_PASS"),
-            database=os.environ.get("MYSQL_DB"),
-            autocommit=False 
-        )
-        if conn.is_connected():
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _open_connection():
+    # opens a brand-new MySQL connection (used by the pool on a miss)
+    conn = mysql.connector.connect(
+        host=os.environ.get("MYSQL_HOST"),
+        user=os.environ.get("MYSQL_USER"),
+        password=os.environ.get("MYSQL_PASS"),
+        database=os.environ.get("MYSQL_DB"),
+        autocommit=False
+    )
+    if not conn.is_connected():
+        raise Error("Could not establish connection.")
+    return conn
+
+
+class _ReservedSlot:
+    # Stands in for a connection that is being opened outside the pool lock
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of MySQL connections.
+
+    Up to `size` connections are kept open between uses; when they are all
+    checked out, up to `max_overflow` extra connections may be opened and
+    are closed again on release. Callers beyond that wait up to `timeout`
+    seconds for a connection to come back.
+    """
+
+    def __init__(self, size=5, max_overflow=5, timeout=30, idle_timeout=300,
+                 pre_ping=True, connect=_open_connection):
+        self.size = max(0, size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self._connect = connect
+        self._idle = deque()  # (conn, released_at)
+        self._checked_out = set()
+        self._cond = threading.Condition()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'discarded': 0,
+        }
+
+    def _total(self):
+        return len(self._idle) + len(self._checked_out)
+
+    def _discard(self, conn):
+        self._stats['discarded'] += 1
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _take_idle(self):
+        # Pop the most recently used idle connection that has not expired
+        now = time.monotonic()
+        while self._idle:
+            conn, released_at = self._idle.pop()
+            if self.idle_timeout and now - released_at > self.idle_timeout:
+                self._discard(conn)
+                continue
             return conn
-        else:
-            print("[DB ERROR] Could not establish connection.")
-            return None
+        return None
+
+    def _checkout(self):
+        # Returns an idle connection, or a _ReservedSlot when a new one may be opened
+        with self._cond:
+            started = None
+            try:
+                while True:
+                    conn = self._take_idle()
+                    if conn is not None:
+                        self._checked_out.add(conn)
+                        return conn
+
+                    if self._total() < self.size + self.max_overflow:
+                        # Reserve the slot, then connect outside the lock
+                        slot = _ReservedSlot()
+                        self._checked_out.add(slot)
+                        return slot
+
+                    if started is None:
+                        self._stats['waits'] += 1
+                        started = time.monotonic()
+                    remaining = started + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise Error("Timed out waiting for a pooled connection.")
+                    self._cond.wait(remaining)
+            finally:
+                if started is not None:
+                    self._stats['wait_time'] += time.monotonic() - started
+
+    def _forget(self, conn):
+        with self._cond:
+            self._checked_out.discard(conn)
+            self._cond.notify()
+
+    def acquire(self):
+        while True:
+            slot = self._checkout()
+            if isinstance(slot, _ReservedSlot):
+                break
+            # Health check happens outside the lock so a slow ping doesn't block other desks
+            if not self.pre_ping or slot.is_connected():
+                with self._cond:
+                    self._stats['hits'] += 1
+                return slot
+            self._forget(slot)
+            with self._cond:
+                self._discard(slot)
+
+        try:
+            conn = self._connect()
+        except Exception:
+            self._forget(slot)
+            raise
+
+        with self._cond:
+            self._stats['misses'] += 1
+            self._checked_out.discard(slot)
+            self._checked_out.add(conn)
+        return conn
+
+    def release(self, conn):
+        with self._cond:
+            if conn not in self._checked_out:
+                return False
+
+        # Never hand out a connection with an open transaction/snapshot.
+        # in_transaction is tracked client-side, so this costs no round trip;
+        # liveness is checked on acquire when pre_ping is on.
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            healthy = False
+
+        with self._cond:
+            self._checked_out.discard(conn)
+            if healthy and len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+            self._cond.notify()
+        return True
+
+    def close_all(self):
+        # Closes idle connections; checked-out ones are closed when released
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                try:
+                    conn.close()
+                except Error:
+                    pass
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._checked_out)
+            stats['idle'] = len(self._idle)
+            stats['size'] = self.size
+            stats['max_overflow'] = self.max_overflow
+            requests = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / requests if requests else 0.0
+            return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Lazily creates the process-wide pool from the .env settings
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=_env_int("MYSQL_POOL_SIZE", 5),
+                    max_overflow=_env_int("MYSQL_POOL_MAX_OVERFLOW", 5),
+                    timeout=_env_int("MYSQL_POOL_TIMEOUT", 30),
+                    idle_timeout=_env_int("MYSQL_POOL_IDLE_TIMEOUT", 300),
+                    pre_ping=_env_bool("MYSQL_POOL_PRE_PING", True),
+                )
+    return _pool
+
+
+def get_pool_stats():
+    """Returns hit/miss/wait counters and current usage of the connection pool."""
+    return get_pool().stats()
+
+
+def get_connection(session=None):
+    # returns a pooled MySQL connection; hand it back with close_connection()
+    # Inside a Session the session's connection is reused instead
+    if session is not None:
+        return session.connection
+    try:
+        return get_pool().acquire()
     except Error as e:
         print(f"[DB ERROR] Failed to connect: {e}")
         return None
 
-def close_connection(conn, cursor=None):
-    """Safely closes connection and cursor."""
+
+def close_connection(conn, cursor=None, session=None):
+    """Safely closes the cursor and returns the connection to the pool."""
     if cursor:
         try:
             cursor.close()
         except Error:
             pass
-    if conn and conn.is_connected():
+    if session is not None:
+        # The session owns the connection and releases it on exit
+        return
+    if conn and not get_pool().release(conn):
+        # Not a pooled connection - close it outright
         try:
-            conn.close()
+            if conn.is_connected():
+                conn.close()
         except Error:
             pass
 
-        
\ No newline at end of file
+
+def commit(conn, session=None):
+    # Inside a Session the commit is deferred until the whole unit of work succeeds
+    if session is None:
+        conn.commit()
+
+
+def rollback(conn, session=None):
+    # Inside a Session a failed step dooms the whole unit of work
+    if session is None:
+        conn.rollback()
+    else:
+        session.rollback_only = True
+
+
+class Session:
+    """
+    Unit of work: one pooled connection and one transaction shared by every
+    service call that is passed the session.
+
+        with Session() as session:
+            if LoanManager.verify_borrower_exists(card_id, session=session):
+                LoanManager.checkout_book(isbn, card_id, session=session)
+
+    The transaction is committed when the block exits normally and rolled
+    back if it raises or a service reported a failure via rollback().
+    With consistent_snapshot=True every read in the block sees the same
+    snapshot of the database.
+    """
+
+    def __init__(self, consistent_snapshot=False):
+        self.consistent_snapshot = consistent_snapshot
+        self.connection = None
+        self.rollback_only = False
+
+    def __enter__(self):
+        self.connection = get_connection()
+        if self.connection and self.consistent_snapshot:
+            try:
+                self.connection.start_transaction(consistent_snapshot=True)
+            except Error as e:
+                print(f"[DB ERROR] Failed to start transaction: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self.connection
+        self.connection = None
+        if not conn:
+            return False
+        try:
+            if exc_type is None and not self.rollback_only:
+                conn.commit()
+            else:
+                conn.rollback()
+        except Error:
+            # A failed commit must not look like success to the caller
+            try:
+                conn.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            close_connection(conn)
+        return False
+
+
+def make_page(rows, page_size, key):
+    """
+    Builds a keyset page from rows fetched with LIMIT page_size + 1.
+    next_cursor is the `key` value to pass as `after` for the next page,
+    or None when this is the last page.
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        'rows': rows,
+        'next_cursor': rows[-1][key] if has_more and rows else None,
+        'total': None,
+        'total_is_estimate': False,
+    }
+
+
+def catalog_version(conn):
+    # CATALOG_VERSION counter, bumped by the CSV importer whenever BOOK, AUTHOR
+    # or BOOK_AUTHOR change; in-process indexes rebuild when it moves
+    cursor = conn.cursor()
+    cursor.execute("SELECT Version FROM CATALOG_VERSION WHERE Id = 1")
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else 0
+
+
+def escape_like(value):
+    # Makes user input match literally inside a LIKE pattern
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def count_capped(cursor, select_sql, params, cap):
+    # Counts rows of select_sql but stops scanning after `cap` matches;
+    # returns (count, is_estimate) where is_estimate means "at least count"
+    cursor.execute(
+        f"SELECT COUNT(*) FROM ({select_sql} LIMIT {int(cap) + 1}) AS capped",
+        params
+    )
+    count = cursor.fetchone()[0]
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+def kill_query(connection_id):
+    # Stops the statement running on another connection (the connection itself stays open)
+    conn = get_connection()
+    if not conn:
+        return False
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"KILL QUERY {int(connection_id)}")
+        return True
+    except Error as e:
+        print(f"[DB ERROR] Failed to cancel query: {e}")
+        return False
+    finally:
+        close_connection(conn, cursor)
+
+
+class QueryCanceller:
+    """
+    Lets another thread stop a service call's running statement.
+
+        canceller = QueryCanceller()
+        # worker thread
+        BookSearchManager.search_page(query, canceller=canceller)
+        # GUI thread, when the result is no longer wanted
+        canceller.cancel()
+
+    The service attaches its connection while it runs; cancel() issues
+    KILL QUERY for that connection, or makes a later attach() fail if the
+    call has not started yet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connection_id = None
+        self.cancelled = False
+
+    def attach(self, conn):
+        # Returns False if the call was cancelled before it reached the database
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._connection_id = conn.connection_id
+            return True
+
+    def detach(self):
+        with self._lock:
+            self._connection_id = None
+
+    def cancel(self):
+        # Held across the KILL so the connection cannot be detached and
+        # reused by another query in the meantime
+        with self._lock:
+            self.cancelled = True
+            if self._connection_id is not None:
+                kill_query(self._connection_id)
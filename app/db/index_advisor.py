@@ -0,0 +1,205 @@
+import ast
+import os
+import re
+import sys
+from mysql.connector import Error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import get_connection, close_connection
+
+# Index advisor: runs EXPLAIN on every SQL statement in app/services and
+# reports full table/index scans, so query changes that lose an index show up
+# before they reach the circulation desks.
+#
+#   python -m app.db.index_advisor [--fail-on-scan] [--verbose]
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+
+SQL_START = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+# Sample value bound to every %s placeholder - a string keeps VARCHAR keys
+# sargable and MySQL converts it for INT/DATE comparisons
+SAMPLE_PARAM = '1'
+
+# EXPLAIN access types that read a whole table or index
+SCAN_TYPES = {
+    'ALL': 'full table scan',
+    'index': 'full index scan',
+}
+
+
+def literal_sql(node):
+    # Text of a string constant or f-string; interpolated fragments become ''
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+        return "".join(parts)
+    return None
+
+
+def extract_statements(directory=SERVICES_DIR):
+    # Returns [(label, sql, params)] for each SQL literal found in the services
+    statements = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.py'):
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        # Constant pieces of an f-string are also visited on their own; skip them
+        fstring_parts = {
+            id(value)
+            for node in ast.walk(tree) if isinstance(node, ast.JoinedStr)
+            for value in node.values
+        }
+        for node in ast.walk(tree):
+            if id(node) in fstring_parts:
+                continue
+            sql = literal_sql(node)
+            if sql and SQL_START.match(sql):
+                label = f"{os.path.relpath(path)}:{node.lineno}"
+                statements.append((label, sql, None))
+    return statements
+
+
+def builder_statements():
+    # SQL assembled at runtime by the services, with representative inputs
+    from services.book_search import BookSearchManager
+    from services.borrower_manager import BorrowerManager
+    from services.fine import FinesManager
+    from services.loan_manager import LoanManager
+    from services.trigram_index import TrigramIndex
+
+    statements = []
+    for mode in (BookSearchManager.MODE_SUBSTRING, BookSearchManager.MODE_FULLTEXT):
+        source, where, params = BookSearchManager.match_clause("sample query", mode)
+        statements.append((f"BookSearchManager.search [{mode}]",
+                           BookSearchManager.select_sql(source, where), params))
+        statements.append((f"BookSearchManager.search_page [{mode}]",
+                           BookSearchManager.select_sql(source, where, paged=True), params + ("", 51)))
+        statements.append((f"BookSearchManager.search_page [{mode}, total]",
+                           f"SELECT 1 FROM {source} WHERE {where}", params))
+
+    # Field-scoped syntax: each term should reach its index on its own
+    for query in ("isbn:0439136350", "isbn:04391", 'title:"sample phrase"', "title:sa",
+                  "author:sample", "author:sa"):
+        source, where, params = BookSearchManager.match_clause(query, BookSearchManager.MODE_FULLTEXT)
+        statements.append((f"BookSearchManager.search [{query}]",
+                           BookSearchManager.select_sql(source, where), params))
+
+    statements.append(("TrigramIndex.book_rows [status]",
+                       TrigramIndex.status_sql(2), ("sample1", "sample2")))
+    statements.append(("TrigramIndex.refresh [added]",
+                       TrigramIndex.BOOKS_SQL + " WHERE b.Added_at >= %s", ("2024-01-01",)))
+
+    pattern = ("%sample%",) * 3
+    statements.append(("BorrowerManager.search_borrowers",
+                       BorrowerManager.search_sql(include_fines=True), pattern))
+    statements.append(("BorrowerManager.search_borrowers_page",
+                       BorrowerManager.search_sql(include_fines=True, paged=True), pattern + ("", 51)))
+    for query in ("card:ID000001", "card:ID00", "ssn:123-45-6789", "name:sample"):
+        where, params = BorrowerManager.match_clause(query)
+        statements.append((f"BorrowerManager.search_borrowers [{query}]",
+                           BorrowerManager.search_sql(include_fines=True, where=where), params))
+    statements.append(("LoanManager.search_active_loans",
+                       LoanManager.search_active_loans_sql(), pattern))
+    statements.append(("LoanManager.search_active_loans_page",
+                       LoanManager.search_active_loans_sql(paged=True), pattern + (0, 51)))
+
+    for label, since in (("full", None), ("incremental", "2024-01-01")):
+        late_sql, params = FinesManager.late_loans_query(since)
+        statements.append((f"FinesManager.update_fines [{label}]", late_sql, params))
+    return statements
+
+
+def bind_sample_params(sql):
+    # Fills placeholders so the statement can be EXPLAINed without real input
+    sql = re.sub(r'LIMIT\s+%s', 'LIMIT 10', sql, flags=re.IGNORECASE)
+    return sql, (SAMPLE_PARAM,) * sql.count('%s')
+
+
+def explain(cursor, sql, params=None):
+    if params is None:
+        sql, params = bind_sample_params(sql)
+    cursor.execute(f"EXPLAIN {sql}", params)
+    return cursor.fetchall()
+
+
+def find_scans(plan):
+    # [(table, description, estimated_rows)] for plan rows that scan a base table
+    scans = []
+    for row in plan:
+        table = row.get('table') or ''
+        if table.startswith('<'):
+            # Derived/union/subquery result tables, not base tables
+            continue
+        access = row.get('type')
+        if access in SCAN_TYPES:
+            scans.append((table, SCAN_TYPES[access], row.get('rows')))
+    return scans
+
+
+def run(verbose=False):
+    """
+    EXPLAINs every service statement. Returns (scans, failures) where scans is
+    [(label, table, description, rows)] and failures is [(label, error)].
+    """
+    conn = get_connection()
+    if not conn:
+        return None, None
+
+    scans = []
+    failures = []
+    try:
+        cursor = conn.cursor(dictionary=True)
+        for label, sql, params in extract_statements() + builder_statements():
+            try:
+                plan = explain(cursor, sql, params)
+            except Error as e:
+                # Literals with runtime fragments may not parse on their own;
+                # the builder statements cover those queries
+                failures.append((label, e.msg))
+                continue
+
+            found = find_scans(plan)
+            for table, description, rows in found:
+                scans.append((label, table, description, rows))
+            if verbose and not found:
+                print(f"[OK]   {label}")
+        cursor.close()
+    finally:
+        close_connection(conn)
+
+    return scans, failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Report full scans in service SQL')
+    parser.add_argument('--fail-on-scan', action='store_true',
+                        help='Exit with status 1 if any statement scans a whole table or index')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Also list statements that use indexes and ones that could not be explained')
+    args = parser.parse_args()
+
+    scans, failures = run(args.verbose)
+    if scans is None:
+        print("Failed to connect to database")
+        sys.exit(1)
+
+    for label, table, description, rows in scans:
+        print(f"[SCAN] {label:<50} {table:<12} {description} (~{rows} rows)")
+
+    if args.verbose:
+        for label, error in failures:
+            print(f"[SKIP] {label:<50} {error}")
+
+    print()
+    print(f"{len(scans)} scan(s) found, {len(failures)} statement(s) skipped")
+    sys.exit(1 if scans and args.fail_on_scan else 0)
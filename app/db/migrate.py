@@ -0,0 +1,195 @@
+import os
+import re
+import sys
+from mysql.connector import Error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import get_connection, close_connection
+
+# Versioned schema migrations.
+# Each file in normalization/sql/migrations is named NNN_description.sql and is
+# applied once, in order; applied versions are recorded in SCHEMA_VERSION.
+# A fresh install from libms_schema.sql is already at the latest version.
+#
+# Migrations must be safe to re-run against a database that already has some
+# of their objects (created by hand, or by a newer libms_schema.sql): tables
+# use CREATE TABLE IF NOT EXISTS and backfills INSERT IGNORE. MySQL has no
+# IF NOT EXISTS for indexes and columns, so an ADD INDEX / ADD COLUMN whose
+# object is already there is skipped here instead of failing the run.
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'normalization', 'sql', 'migrations'
+)
+
+MIGRATION_FILE = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+# MySQL error numbers meaning the statement's object already exists
+ALREADY_EXISTS = {
+    1050,   # ER_TABLE_EXISTS_ERROR
+    1060,   # ER_DUP_FIELDNAME
+    1061,   # ER_DUP_KEYNAME
+}
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    # Returns [(version, name, path)] sorted by version
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration version in {directory}")
+    return migrations
+
+
+def split_statements(sql_text):
+    # Strips -- comments and splits on ';' (migrations don't define procedures)
+    lines = [line for line in sql_text.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in "\n".join(lines).split(';') if stmt.strip()]
+
+
+def ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SCHEMA_VERSION (
+            Version     INT NOT NULL,
+            Name        VARCHAR(100) NOT NULL,
+            Applied_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pk_schema_version PRIMARY KEY (Version)
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT Version FROM SCHEMA_VERSION")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def execute_statement(cursor, statement):
+    # Runs one migration statement; returns False if it was skipped because
+    # what it creates is already there
+    try:
+        cursor.execute(statement)
+        return True
+    except Error as e:
+        if e.errno not in ALREADY_EXISTS:
+            raise
+        print(f"[MIGRATE]   Already present, skipped: {statement.splitlines()[0]}")
+        return False
+
+
+def record_version(cursor, version, name):
+    cursor.execute(
+        "INSERT INTO SCHEMA_VERSION (Version, Name) VALUES (%s, %s)",
+        (version, name)
+    )
+
+
+def migrate(target=None, baseline=None, dry_run=False):
+    """
+    Applies pending migrations up to `target` (default: latest).
+    `baseline` marks every migration up to that version as applied without
+    running it, for databases created from an already up-to-date schema.
+    Returns (success, message, applied_list).
+    """
+    conn = get_connection()
+    if not conn:
+        return False, "Failed to connect to database", []
+
+    applied = []
+    baselined = []
+    try:
+        cursor = conn.cursor()
+        ensure_version_table(cursor)
+        done = applied_versions(cursor)
+
+        for version, name, path in list_migrations():
+            if version in done:
+                continue
+            if target is not None and version > target:
+                break
+
+            if baseline is not None and version <= baseline:
+                print(f"[MIGRATE] Baseline {version:03d}_{name}")
+                if not dry_run:
+                    record_version(cursor, version, name)
+                    conn.commit()
+                baselined.append(version)
+                continue
+
+            print(f"[MIGRATE] Applying {version:03d}_{name}")
+            if dry_run:
+                applied.append(version)
+                continue
+
+            with open(path, encoding='utf-8') as f:
+                statements = split_statements(f.read())
+            # DDL commits implicitly in MySQL, so the version row is written
+            # right after the last statement of the file succeeds
+            for statement in statements:
+                execute_statement(cursor, statement)
+            record_version(cursor, version, name)
+            conn.commit()
+            applied.append(version)
+
+        cursor.close()
+        if not applied and not baselined:
+            return True, "Schema is up to date", applied
+        if not applied:
+            return True, f"Baselined {len(baselined)} migration(s)", applied
+        if baselined:
+            return True, f"Baselined {len(baselined)} and applied {len(applied)} migration(s)", applied
+        return True, f"Applied {len(applied)} migration(s)", applied
+
+    except Error as e:
+        conn.rollback()
+        return False, f"Migration failed: {e}", applied
+    finally:
+        close_connection(conn)
+
+
+def status():
+    # Returns [(version, name, is_applied)] for every known migration
+    conn = get_connection()
+    if not conn:
+        return None
+
+    try:
+        cursor = conn.cursor()
+        ensure_version_table(cursor)
+        done = applied_versions(cursor)
+        cursor.close()
+        return [(version, name, version in done) for version, name, _ in list_migrations()]
+    except Error as e:
+        print(f"[DB ERROR] Failed to read schema version: {e}")
+        return None
+    finally:
+        close_connection(conn)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Library schema migrations')
+    parser.add_argument('action', choices=['status', 'up'],
+                        help='status (list migrations) or up (apply pending migrations)')
+    parser.add_argument('--target', type=int, help='Stop after this version')
+    parser.add_argument('--baseline', type=int,
+                        help='Mark migrations up to this version as applied without running them')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be applied')
+    args = parser.parse_args()
+
+    if args.action == 'status':
+        rows = status()
+        if rows is None:
+            sys.exit(1)
+        for version, name, is_applied in rows:
+            print(f"  {'[x]' if is_applied else '[ ]'} {version:03d}_{name}")
+    else:
+        success, message, _ = migrate(args.target, args.baseline, args.dry_run)
+        print(message)
+        sys.exit(0 if success else 1)
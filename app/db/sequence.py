@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+from mysql.connector import Error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import get_connection, close_connection, _env_int
+
+
+class SequenceAllocator:
+    """
+    Hands out integer IDs from a row in ID_SEQUENCE.
+
+    Each process reserves a block of `block_size` IDs with one atomic
+    UPDATE and then serves IDs from memory, so allocation is O(1) and two
+    processes can never receive the same ID. Reservations are committed on
+    their own connection, so IDs are never reused even if the caller's
+    transaction rolls back; unused IDs in a block are simply skipped.
+    """
+
+    def __init__(self, name, block_size=10):
+        self.name = name
+        self.block_size = max(1, block_size)
+        self._next = 0
+        self._limit = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, count):
+        # Atomically claims `count` consecutive IDs; returns the first one
+        conn = get_connection()
+        if not conn:
+            raise Error("Failed to connect to database")
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE ID_SEQUENCE SET Next_val = LAST_INSERT_ID(Next_val + %s) WHERE Name = %s",
+                (count, self.name)
+            )
+            if cursor.rowcount != 1:
+                raise Error(f"Unknown ID sequence: {self.name}")
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
+            return end - count
+        except Error:
+            conn.rollback()
+            raise
+        finally:
+            close_connection(conn)
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = self.reserve(self.block_size)
+                self._limit = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_allocator(name):
+    # One allocator per sequence per process; block size comes from .env
+    with _allocators_lock:
+        if name not in _allocators:
+            _allocators[name] = SequenceAllocator(name, _env_int("MYSQL_ID_BLOCK_SIZE", 10))
+        return _allocators[name]
+
@@ -0,0 +1,246 @@
+from mysql.connector import Error
+from bisect import bisect_left
+from heapq import merge
+from typing import List, Tuple
+import threading
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import get_connection, close_connection, catalog_version
+
+
+def fold(text: str) -> str:
+    # Case-insensitive comparison key
+    return " ".join(text.split()).casefold()
+
+
+class PrefixIndex:
+    """
+    Immutable sorted arrays of (key, text) answering prefix lookups with bisect.
+
+    Several keys may point at the same text (an author is indexed by full
+    name and by last name); the text object itself is shared, not copied.
+    """
+
+    def __init__(self, entries=()):
+        entries = sorted(set(entries))
+        self.keys = [key for key, _ in entries]
+        self.texts = [text for _, text in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def merged(self, entries):
+        # New index with entries added; a linear merge of two sorted runs
+        new = sorted(set(entries))
+        index = PrefixIndex()
+        last = None
+        for entry in merge(zip(self.keys, self.texts), new):
+            if entry != last:
+                index.keys.append(entry[0])
+                index.texts.append(entry[1])
+                last = entry
+        return index
+
+    def scan(self, prefix_key):
+        # Yields (key, text) for every key starting with prefix_key, in key order
+        keys = self.keys
+        i = bisect_left(keys, prefix_key)
+        while i < len(keys) and keys[i].startswith(prefix_key):
+            yield keys[i], self.texts[i]
+            i += 1
+
+
+class AutocompleteManager:
+    """
+    In-memory title and author suggestions for the search box.
+
+    load() reads every title and author name once; suggest() then answers
+    from sorted arrays without touching MySQL. refresh() only adds books with
+    BOOK.Added_at at or after the last one seen, so it stays cheap to call
+    periodically. When the importer has changed the catalog (CATALOG_VERSION
+    moved), refresh() rebuilds instead, so updated or deleted titles and
+    newly linked authors are picked up too.
+    """
+
+    TITLE = 'title'
+    AUTHOR = 'author'
+    SUGGESTION_LIMIT = 10
+
+    # Indexes are replaced wholesale (never mutated), so suggest() can run on
+    # the GUI thread while a refresh builds the next version on a worker
+    _titles = PrefixIndex()
+    _authors = PrefixIndex()
+    _author_names = set()
+    _watermark = None          # newest BOOK.Added_at indexed
+    _watermark_isbns = set()   # books already indexed with that Added_at
+    _version = None            # CATALOG_VERSION the indexes were built at
+    _loaded = False
+    _lock = threading.Lock()   # one load/refresh at a time
+
+    @staticmethod
+    def author_entries(rows):
+        # Authors are found by full name and by last name
+        entries = []
+        for row in rows:
+            name = row['Name']
+            entries.append((fold(name), name))
+            if row['Lname']:
+                entries.append((fold(row['Lname']), name))
+        return entries
+
+    @staticmethod
+    def advance_watermark(books):
+        cls = AutocompleteManager
+        for book in books:
+            if cls._watermark is None or book['Added_at'] > cls._watermark:
+                cls._watermark = book['Added_at']
+                cls._watermark_isbns = set()
+            if book['Added_at'] == cls._watermark:
+                cls._watermark_isbns.add(book['Isbn'])
+
+    @staticmethod
+    def load(session=None) -> Tuple[bool, str, dict]:
+        # Builds the indexes from the whole catalog
+        cls = AutocompleteManager
+        conn = get_connection(session)
+        if not conn:
+            return False, "Failed to connect to database", {}
+
+        with cls._lock:
+            try:
+                # Read first, so a change made during the load triggers a rebuild
+                version = catalog_version(conn)
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("SELECT Isbn, Title, Added_at FROM BOOK")
+                books = cursor.fetchall()
+                cursor.execute("SELECT Name, Lname FROM AUTHOR")
+                authors = cursor.fetchall()
+                cursor.close()
+            except Error as e:
+                print(f"[DB ERROR] Failed to load autocomplete index: {e}")
+                return False, f"Database error: {str(e)}", {}
+            finally:
+                close_connection(conn, session=session)
+
+            cls._titles = PrefixIndex((fold(b['Title']), b['Title']) for b in books)
+            cls._authors = PrefixIndex(cls.author_entries(authors))
+            cls._author_names = {a['Name'] for a in authors}
+            cls._watermark = None
+            cls._watermark_isbns = set()
+            cls.advance_watermark(books)
+            cls._version = version
+            cls._loaded = True
+
+        stats = cls.stats()
+        return True, f"Indexed {len(books)} titles and {len(authors)} authors", stats
+
+    @staticmethod
+    def refresh(session=None) -> Tuple[bool, str, dict]:
+        # Adds books (and their authors) added since the last load/refresh, or
+        # rebuilds everything if the importer has changed the catalog since
+        cls = AutocompleteManager
+        if not cls._loaded or cls._watermark is None:
+            return cls.load(session)
+
+        conn = get_connection(session)
+        if not conn:
+            return False, "Failed to connect to database", {}
+
+        with cls._lock:
+            try:
+                changed = catalog_version(conn) != cls._version
+                if not changed:
+                    cursor = conn.cursor(dictionary=True)
+                    cursor.execute("""
+                        SELECT Isbn, Title, Added_at
+                        FROM BOOK
+                        WHERE Added_at >= %s
+                    """, (cls._watermark,))
+                    books = [b for b in cursor.fetchall() if b['Isbn'] not in cls._watermark_isbns]
+
+                    authors = []
+                    if books:
+                        cursor.execute("""
+                            SELECT DISTINCT a.Name, a.Lname
+                            FROM BOOK b
+                            JOIN BOOK_AUTHOR ba ON ba.Isbn = b.Isbn
+                            JOIN AUTHOR a ON a.Author_id = ba.Author_id
+                            WHERE b.Added_at >= %s
+                        """, (cls._watermark,))
+                        authors = [a for a in cursor.fetchall() if a['Name'] not in cls._author_names]
+                    cursor.close()
+            except Error as e:
+                print(f"[DB ERROR] Failed to refresh autocomplete index: {e}")
+                return False, f"Database error: {str(e)}", {}
+            finally:
+                close_connection(conn, session=session)
+
+            if not changed:
+                if books:
+                    cls._titles = cls._titles.merged((fold(b['Title']), b['Title']) for b in books)
+                    cls.advance_watermark(books)
+                if authors:
+                    cls._authors = cls._authors.merged(cls.author_entries(authors))
+                    cls._author_names.update(a['Name'] for a in authors)
+                return True, f"Added {len(books)} titles and {len(authors)} authors", cls.stats()
+
+        # Updated or deleted rows and newly linked authors can't be found by
+        # Added_at, so the indexes are rebuilt (swapped in whole by load())
+        return cls.load(session)
+
+    @staticmethod
+    def suggest(prefix: str, limit: int = SUGGESTION_LIMIT) -> List[Tuple[str, str]]:
+        # Up to `limit` (text, kind) pairs whose title, author name or author
+        # last name starts with prefix, in alphabetical order
+        cls = AutocompleteManager
+        key = fold(prefix)
+        if not key:
+            return []
+
+        titles = ((k, text, cls.TITLE) for k, text in cls._titles.scan(key))
+        authors = ((k, text, cls.AUTHOR) for k, text in cls._authors.scan(key))
+        results = []
+        seen = set()
+        for _, text, kind in merge(titles, authors):
+            if (text, kind) in seen:
+                continue
+            seen.add((text, kind))
+            results.append((text, kind))
+            if len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def stats() -> dict:
+        cls = AutocompleteManager
+        return {
+            'title_entries': len(cls._titles),
+            'author_entries': len(cls._authors),
+            'watermark': cls._watermark,
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        print("Usage:")
+        print("  python -m app.services.autocomplete <prefix>")
+        print("\nExample:")
+        print("  python -m app.services.autocomplete harr")
+        sys.exit(0)
+
+    success, message, stats = AutocompleteManager.load()
+    print(message)
+    if not success:
+        sys.exit(1)
+
+    prefix = " ".join(sys.argv[1:])
+    started = time.perf_counter()
+    suggestions = AutocompleteManager.suggest(prefix)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+
+    for text, kind in suggestions:
+        print(f"  [{kind:<6}] {text}")
+    print(f"\n{len(suggestions)} suggestion(s) in {elapsed_us:.0f} us")
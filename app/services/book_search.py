@@ -1,69 +1,473 @@
 from mysql.connector import Error
+from bisect import bisect_right
 from typing import List, Dict
+import heapq
+import re
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db.database import get_connection, close_connection
+from db.database import get_connection, close_connection, make_page, count_capped, escape_like
+from services.trigram_index import TrigramIndex
+from services.query_syntax import parse_query, unquote, normalize_isbn, is_isbn
 
 
 class BookSearchManager:
     # Manages book search and availability operations for the Book Search and Availability feature
     
+    # 'substring' keeps the original LIKE '%q%' semantics (full scan);
+    # 'fulltext' uses the FULLTEXT indexes on BOOK.Title and AUTHOR.Name;
+    # 'trigram' gives the substring matches from an in-process trigram index
+    MODE_SUBSTRING = 'substring'
+    MODE_FULLTEXT = 'fulltext'
+    MODE_TRIGRAM = 'trigram'
+    MODES = (MODE_SUBSTRING, MODE_FULLTEXT, MODE_TRIGRAM)
+    DEFAULT_MODE = os.environ.get("LIBMS_SEARCH_MODE", MODE_FULLTEXT)
+    
+    PAGE_SIZE = 50
+    # Totals above this are reported as estimates ("10000+") to keep counting cheap
+    COUNT_CAP = 10000
+    
+    # Matches InnoDB's default innodb_ft_min_token_size; shorter words are not indexed
+    FULLTEXT_MIN_TOKEN = 3
+    
+    # Ranked search keeps only the best TOP_K matches. A book scores its ISBN
+    # match plus its best title match plus its best author match, so an exact
+    # ISBN beats a title prefix, which beats an author hit.
+    TOP_K = PAGE_SIZE
+    
+    # Prefixes understood by the query syntax (isbn:... title:"..." author:...)
+    FIELDS = ('isbn', 'title', 'author')
+    
+    # FROM source of a match that filters BOOK directly
+    BOOK_SOURCE = "BOOK b"
+    RANK_WEIGHTS = {
+        'isbn_exact': 100,
+        'isbn_prefix': 60,
+        'title_exact': 50,
+        'title_prefix': 40,
+        'title_words': 25,      # every query word starts a title word
+        'title_substring': 10,
+        'author_exact': 30,
+        'author_words': 20,
+        'author_substring': 5,
+    }
+    
     @staticmethod
-    def search(query_str: str) -> List[Dict]:
-        if not query_str or not query_str.strip():
-            return []
+    def fulltext_words(query_str: str) -> List[str]:
+        # Lower-cased words of the query that are long enough to be in the index
+        words = re.findall(r"\w+", query_str.lower())
+        return [w for w in words if len(w) >= BookSearchManager.FULLTEXT_MIN_TOKEN]
+    
+    @staticmethod
+    def fulltext_terms(query_str: str) -> str:
+        # Turn free text into a boolean-mode query: every word required, prefix-matched,
+        # and every "quoted phrase" required as a phrase.
+        # Returns "" when no word is long enough to be in the index.
+        terms = []
+        for phrase, words in re.findall(r'"([^"]*)"?|([^\s"]+)', query_str):
+            if phrase.strip():
+                terms.append(BookSearchManager.phrase_terms(phrase))
+            elif words:
+                terms.extend(f"+{w}*" for w in BookSearchManager.fulltext_words(words))
+        return " ".join(term for term in terms if term)
+    
+    @staticmethod
+    def parse(query_str: str):
+        # (free_text, [(field, value, is_phrase)]); a query that is just an
+        # ISBN (10 or 13 digits, hyphens allowed) is treated as isbn:
+        free_text, scoped = parse_query(query_str, BookSearchManager.FIELDS)
+        if not scoped and is_isbn(free_text):
+            return "", [('isbn', free_text.strip(), False)]
+        return free_text, scoped
+    
+    @staticmethod
+    def has_field_terms(query_str: str) -> bool:
+        return bool(BookSearchManager.parse(query_str)[1])
+    
+    @staticmethod
+    def sql_mode(query_str: str, mode: str) -> str:
+        # Field terms are SQL predicates, so trigram mode hands those queries to
+        # SQL, keeping substring matching for any free text alongside them
+        if mode == BookSearchManager.MODE_TRIGRAM and BookSearchManager.has_field_terms(query_str):
+            return BookSearchManager.MODE_SUBSTRING
+        return mode
+    
+    @staticmethod
+    def phrase_terms(value: str) -> str:
+        # Boolean-mode phrase: the words must appear together, in order.
+        # "" when no word is long enough to be in the index.
+        words = re.findall(r"\w+", value.lower())
+        if not BookSearchManager.fulltext_words(value):
+            return ""
+        return f'+"{" ".join(words)}"'
+    
+    @staticmethod
+    def field_clause(field: str, value: str, phrase: bool):
+        # (WHERE fragment, params) for one scoped term, on an indexed column:
+        # isbn: equality (or PK prefix), title:/author: FULLTEXT, or a B-tree
+        # prefix when the words are too short for the index
+        if field == 'isbn':
+            isbn = normalize_isbn(value)
+            if is_isbn(isbn):
+                return "b.Isbn = %s", (isbn,)
+            return "b.Isbn LIKE %s", (f"{escape_like(isbn)}%",)
         
-        conn = get_connection()
-        if not conn:
-            return []
-
-        # Format for substring match
-        q = f"%{query_str}%"
+        terms = BookSearchManager.phrase_terms(value) if phrase else BookSearchManager.fulltext_terms(value)
+        if field == 'title':
+            if terms:
+                return "MATCH(b.Title) AGAINST (%s IN BOOLEAN MODE)", (terms,)
+            return "b.Title LIKE %s", (f"{escape_like(value)}%",)
         
-        sql = """
+        # author
+        if terms:
+            author_match, params = "MATCH(a2.Name) AGAINST (%s IN BOOLEAN MODE)", (terms,)
+        else:
+            author_match, params = "a2.Name LIKE %s", (f"{escape_like(value)}%",)
+        return f"""
+            b.Isbn IN (
+                SELECT ba2.Isbn
+                FROM BOOK_AUTHOR ba2
+                JOIN AUTHOR a2 ON ba2.Author_id = a2.Author_id
+                WHERE {author_match}
+            )
+        """, params
+    
+    @staticmethod
+    def match_clause(query_str: str, mode: str):
+        # Returns (FROM source, WHERE fragment, params) selecting the matching
+        # books; the source always exposes BOOK as `b`. Scoped terms (and a
+        # bare ISBN) are ANDed with the free-text match.
+        free_text, scoped = BookSearchManager.parse(query_str)
+        if not scoped:
+            return BookSearchManager.free_text_clause(free_text, mode)
+        
+        source, where, params = BookSearchManager.BOOK_SOURCE, "TRUE", ()
+        if free_text.strip():
+            source, where, params = BookSearchManager.free_text_clause(free_text, mode)
+        
+        clauses = [f"({where})"]
+        for field, value, phrase in scoped:
+            field_where, field_params = BookSearchManager.field_clause(field, value, phrase)
+            clauses.append(f"({field_where})")
+            params += field_params
+        return source, " AND ".join(clauses), params
+    
+    @staticmethod
+    def free_text_clause(query_str: str, mode: str):
+        # Free text matched against Isbn, Title and author Name, as
+        # (FROM source, WHERE fragment, params)
+        if mode == BookSearchManager.MODE_FULLTEXT:
+            terms = BookSearchManager.fulltext_terms(query_str)
+            if terms:
+                # An OR across the FULLTEXT indexes can't use them, so each
+                # branch finds its candidates through its own index and the
+                # union is joined back to BOOK by primary key
+                source = """
+                    (
+                        SELECT Isbn FROM BOOK
+                        WHERE MATCH(Title) AGAINST (%s IN BOOLEAN MODE)
+                        UNION
+                        SELECT ba2.Isbn
+                        FROM AUTHOR a2
+                        JOIN BOOK_AUTHOR ba2 ON ba2.Author_id = a2.Author_id
+                        WHERE MATCH(a2.Name) AGAINST (%s IN BOOLEAN MODE)
+                        UNION
+                        SELECT Isbn FROM BOOK
+                        WHERE Isbn LIKE %s
+                    ) AS m
+                    JOIN BOOK b ON b.Isbn = m.Isbn
+                """
+                return source, "TRUE", (terms, terms, f"{escape_like(unquote(query_str).strip())}%")
+            # Too short for the index - fall through to a substring match
+        
+        q = f"%{unquote(query_str)}%"
+        where = """
+            b.Isbn LIKE %s
+            OR b.Title LIKE %s
+            OR b.Isbn IN (
+                SELECT ba2.Isbn
+                FROM BOOK_AUTHOR ba2
+                JOIN AUTHOR a2 ON ba2.Author_id = a2.Author_id
+                WHERE a2.Name LIKE %s
+            )
+        """
+        return BookSearchManager.BOOK_SOURCE, where, (q, q, q)
+    
+    @staticmethod
+    def matches(query_str: str, isbn: str, title: str, authors: str, mode: str = None) -> bool:
+        # In-memory version of match_clause for a book that was already fetched
+        # (authors as the ", "-joined list from select_sql). Used to narrow a
+        # complete result set when the query is extended, without a new query.
+        mode = mode or BookSearchManager.DEFAULT_MODE
+        names = authors.split(", ") if authors else []
+        
+        if mode == BookSearchManager.MODE_FULLTEXT:
+            terms = BookSearchManager.fulltext_words(query_str)
+            if terms:
+                def has_terms(text):
+                    words = re.findall(r"\w+", (text or "").lower())
+                    return all(any(w.startswith(t) for w in words) for t in terms)
+                return (isbn.lower().startswith(query_str.strip().lower())
+                        or has_terms(title)
+                        or any(has_terms(name) for name in names))
+        
+        q = query_str.lower()
+        return q in isbn.lower() or q in (title or "").lower() or any(q in name.lower() for name in names)
+    
+    @staticmethod
+    def words_prefix(words: List[str], text: str) -> bool:
+        # Every query word starts some word of text
+        text_words = re.findall(r"\w+", text)
+        return all(any(t.startswith(w) for t in text_words) for w in words)
+    
+    @staticmethod
+    def score(query_str: str, isbn: str, title: str, authors: str) -> int:
+        # Field-weighted relevance of one book (authors as the ", "-joined list).
+        # Field prefixes are dropped, so isbn:X scores like X.
+        weights = BookSearchManager.RANK_WEIGHTS
+        free_text, scoped = BookSearchManager.parse(query_str)
+        q = " ".join(" ".join([unquote(free_text)] + [value for _, value, _ in scoped]).lower().split())
+        words = re.findall(r"\w+", q)
+        
+        score = 0
+        # Compared in stored form, so a hyphenated ISBN or an ISBN-13 still counts
+        isbn = normalize_isbn(isbn or "")
+        isbn_q = normalize_isbn(q)
+        if isbn == isbn_q:
+            score += weights['isbn_exact']
+        elif isbn_q and isbn.startswith(isbn_q):
+            score += weights['isbn_prefix']
+        
+        title = " ".join((title or "").lower().split())
+        if title == q:
+            score += weights['title_exact']
+        elif title.startswith(q):
+            score += weights['title_prefix']
+        elif words and BookSearchManager.words_prefix(words, title):
+            score += weights['title_words']
+        elif q in title:
+            score += weights['title_substring']
+        
+        best_author = 0
+        for name in (authors.split(", ") if authors else []):
+            name = " ".join(name.lower().split())
+            if name == q:
+                best_author = max(best_author, weights['author_exact'])
+            elif words and BookSearchManager.words_prefix(words, name):
+                best_author = max(best_author, weights['author_words'])
+            elif q in name:
+                best_author = max(best_author, weights['author_substring'])
+        return score + best_author
+    
+    @staticmethod
+    def top_matches(query_str: str, rows, limit: int):
+        # Returns (best `limit` rows with a 'Score' key, best first; number of rows seen).
+        # rows may be a cursor: nlargest keeps a heap of `limit` rows, not the whole result.
+        seen = [0]
+        
+        def scored():
+            for row in rows:
+                seen[0] += 1
+                row['Score'] = BookSearchManager.score(query_str, row['Isbn'], row['Title'], row['Authors'])
+                yield row
+        
+        # Ties go to the shorter title (the closer match), then to the row seen first
+        top = heapq.nlargest(limit, scored(), key=lambda row: (row['Score'], -len(row['Title'] or "")))
+        return top, seen[0]
+    
+    @staticmethod
+    def select_sql(source: str, where: str, paged: bool = False) -> str:
+        # Book rows with authors and availability for a match_clause() result;
+        # paged adds the Isbn keyset + LIMIT
+        keyset = "AND b.Isbn > %s" if paged else ""
+        limit = "ORDER BY b.Isbn LIMIT %s" if paged else ""
+        return f"""
         SELECT 
             b.Isbn, 
             b.Title, 
             GROUP_CONCAT(a.Name SEPARATOR ', ') as Authors,
             CASE 
-                WHEN SUM(CASE WHEN l.Date_in IS NULL AND l.Loan_id IS NOT NULL THEN 1 ELSE 0 END) > 0 
+                WHEN EXISTS (SELECT 1 FROM ACTIVE_LOAN al WHERE al.Isbn = b.Isbn) 
                 THEN 'OUT' 
                 ELSE 'IN' 
             END as Status
-        FROM BOOK b
+        FROM {source}
         LEFT JOIN BOOK_AUTHOR ba ON b.Isbn = ba.Isbn
         LEFT JOIN AUTHOR a ON ba.Author_id = a.Author_id
-        LEFT JOIN LOAN l ON b.Isbn = l.Isbn
-        WHERE b.Isbn LIKE %s OR b.Title LIKE %s OR a.Name LIKE %s
+        WHERE ({where}) {keyset}
         GROUP BY b.Isbn, b.Title
+        {limit}
         """
+    
+    @staticmethod
+    def resolve_mode(mode):
+        mode = mode or BookSearchManager.DEFAULT_MODE
+        if mode not in BookSearchManager.MODES:
+            print(f"[SEARCH ERROR] Unknown search mode: {mode}")
+            return None
+        return mode
+    
+    @staticmethod
+    def search(query_str: str, mode: str = None, session=None) -> List[Dict]:
+        if not query_str or not query_str.strip():
+            return []
+        
+        mode = BookSearchManager.sql_mode(query_str, BookSearchManager.resolve_mode(mode))
+        if not mode:
+            return []
+        if mode == BookSearchManager.MODE_TRIGRAM:
+            return TrigramIndex.search(unquote(query_str), session=session)
+        
+        conn = get_connection(session)
+        if not conn:
+            return []
+
+        source, where, params = BookSearchManager.match_clause(query_str, mode)
+        sql = BookSearchManager.select_sql(source, where)
         
         results = []
         try:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute(sql, (q, q, q))
+            cursor.execute(sql, params)
             results = cursor.fetchall()
             cursor.close()
         except Error as e:
             print(f"[DB ERROR] Error searching books: {e}")
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
             
         return results
+    
+    @staticmethod
+    def search_page(query_str: str, page_size: int = PAGE_SIZE, after: str = None,
+                    with_total: bool = False, mode: str = None, session=None,
+                    canceller=None) -> Dict:
+        # One page of search results ordered by Isbn. Pass the returned
+        # next_cursor as `after` to get the following page.
+        # A QueryCanceller lets the caller stop the query while it runs.
+        page = make_page([], page_size, 'Isbn')
+        if not query_str or not query_str.strip():
+            return page
+        
+        mode = BookSearchManager.sql_mode(query_str, BookSearchManager.resolve_mode(mode))
+        if not mode:
+            return page
+        if mode == BookSearchManager.MODE_TRIGRAM:
+            return BookSearchManager.trigram_page(query_str, page_size, after, with_total, session)
+        
+        conn = get_connection(session)
+        if not conn:
+            return page
+        if canceller and not canceller.attach(conn):
+            close_connection(conn, session=session)
+            return page
+        
+        source, where, params = BookSearchManager.match_clause(query_str, mode)
+        sql = BookSearchManager.select_sql(source, where, paged=True)
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params + (after or "", page_size + 1))
+            page = make_page(cursor.fetchall(), page_size, 'Isbn')
+            cursor.close()
+            
+            if with_total:
+                cursor = conn.cursor()
+                page['total'], page['total_is_estimate'] = count_capped(
+                    cursor, f"SELECT 1 FROM {source} WHERE {where}", params,
+                    BookSearchManager.COUNT_CAP
+                )
+                cursor.close()
+        except Error as e:
+            if not (canceller and canceller.cancelled):
+                print(f"[DB ERROR] Error searching books: {e}")
+        finally:
+            if canceller:
+                canceller.detach()
+            close_connection(conn, session=session)
+        
+        return page
+
+    @staticmethod
+    def search_ranked(query_str: str, limit: int = TOP_K, mode: str = None, session=None,
+                      canceller=None) -> Dict:
+        # The `limit` best matches, best first, shaped like a search_page page:
+        # next_cursor is always None and total counts every match. Matching
+        # rows are streamed through a bounded heap rather than collected.
+        page = make_page([], limit, 'Isbn')
+        if not query_str or not query_str.strip():
+            return page
+        
+        mode = BookSearchManager.sql_mode(query_str, BookSearchManager.resolve_mode(mode))
+        if not mode:
+            return page
+        
+        if mode == BookSearchManager.MODE_TRIGRAM:
+            isbns = TrigramIndex.match_isbns(unquote(query_str), session=session)
+            candidates = (row for row in map(TrigramIndex.book_fields, isbns) if row)
+            top, page['total'] = BookSearchManager.top_matches(query_str, candidates, limit)
+            # Availability only for the books that made the cut
+            page['rows'] = TrigramIndex.book_rows([row['Isbn'] for row in top], session=session)
+            scores = {ranked['Isbn']: ranked['Score'] for ranked in top}
+            for row in page['rows']:
+                row['Score'] = scores[row['Isbn']]
+            return page
+        
+        conn = get_connection(session)
+        if not conn:
+            return page
+        if canceller and not canceller.attach(conn):
+            close_connection(conn, session=session)
+            return page
+        
+        source, where, params = BookSearchManager.match_clause(query_str, mode)
+        sql = BookSearchManager.select_sql(source, where)
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            page['rows'], page['total'] = BookSearchManager.top_matches(query_str, cursor, limit)
+            cursor.close()
+        except Error as e:
+            if not (canceller and canceller.cancelled):
+                print(f"[DB ERROR] Error searching books: {e}")
+        finally:
+            if canceller:
+                canceller.detach()
+            close_connection(conn, session=session)
+        
+        return page
+    
+    @staticmethod
+    def trigram_page(query_str: str, page_size: int, after: str, with_total: bool, session=None) -> Dict:
+        # search_page for MODE_TRIGRAM: the index returns every matching Isbn
+        # in order, so the keyset is applied in memory and the total is exact
+        isbns = TrigramIndex.match_isbns(unquote(query_str), session=session)
+        start = bisect_right(isbns, after) if after else 0
+        rows = TrigramIndex.book_rows(isbns[start:start + page_size + 1], session=session)
+        page = make_page(rows, page_size, 'Isbn')
+        if with_total:
+            page['total'] = len(isbns)
+        return page
 
 if __name__ == "__main__":
     # No args -> show usage
     if len(sys.argv) == 1:
         print("Usage:")
-        print("  python -m app.services.book_search <search_query>")
+        print("  python -m app.services.book_search [--ranked] <search_query>")
         print("\nExample:")
         print("  python -m app.services.book_search william")
+        print("  python -m app.services.book_search --ranked william")
         sys.exit(0)
     
-    query = " ".join(sys.argv[1:])
-    results = BookSearchManager.search(query)
+    ranked = "--ranked" in sys.argv
+    query = " ".join(arg for arg in sys.argv[1:] if arg != "--ranked")
+    if ranked:
+        # Best matches first, top TOP_K only
+        results = BookSearchManager.search_ranked(query)['rows']
+    else:
+        results = BookSearchManager.search(query)
     
     if not results:
         print(f"No books found matching: {query!r}")
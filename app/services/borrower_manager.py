@@ -1,13 +1,22 @@
 import re
+from decimal import Decimal
 from mysql.connector import Error
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db.database import get_connection, close_connection
+from db.database import get_connection, close_connection, commit, rollback, make_page, count_capped, escape_like
+from db.sequence import get_allocator
+from services.query_syntax import parse_query, unquote, is_card_id, is_ssn
 
 class BorrowerManager:
 
+    PAGE_SIZE = 50
+    COUNT_CAP = 10000
+    
+    # Prefixes understood by the query syntax (card:ID000123 ssn:123-45-6789 name:smith)
+    FIELDS = ('card', 'ssn', 'name')
+
     @staticmethod
     # Validate SSN format
     def validate_ssn(ssn):
@@ -32,18 +41,16 @@ class BorrowerManager:
         return True, ""
     
     @staticmethod
-    def generate_card_id(conn):
-        # Generate next card_id in format ID000XXX
+    def format_card_id(number):
+        # Card IDs look like ID000123
+        return f"ID{number:06d}"
+    
+    @staticmethod
+    def generate_card_id():
+        # Generate next card_id in format ID000XXX from the card_id sequence
+        # (O(1) and collision-free across desks)
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT MAX(CAST(SUBSTRING(Card_id, 3) AS UNSIGNED)) FROM BORROWER")
-            result = cursor.fetchone()
-            cursor.close()
-            
-            max_id = result[0] if result[0] else 0
-            next_id = max_id + 1
-            card_id = f"ID{next_id:06d}"
-            return card_id
+            return BorrowerManager.format_card_id(get_allocator('card_id').next_id())
         except Error as e:
             print(f"[DB ERROR] Failed to generate card_id: {e}")
             return None
@@ -62,7 +69,7 @@ class BorrowerManager:
             return False
     
     @staticmethod
-    def create_borrower(name, ssn, address, fname, lname, email=None, phone=None):
+    def create_borrower(name, ssn, address, fname, lname, email=None, phone=None, session=None):
         #Create a new borrower in the system.
 
         # Validate required fields
@@ -74,7 +81,7 @@ class BorrowerManager:
         # Remove dashes from SSN for storage
         ssn_clean = ssn.replace('-', '')
         
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             print("[BORROWER] Failed to get database connection")
             return False, "Failed to connect to database", None
@@ -86,7 +93,7 @@ class BorrowerManager:
                 return False, f"A borrower with SSN {ssn} already exists in the system", None
             
             # Generate new card_id
-            card_id = BorrowerManager.generate_card_id(conn)
+            card_id = BorrowerManager.generate_card_id()
             if not card_id:
                 print("[BORROWER] Failed to generate card ID")
                 return False, "Failed to generate card ID", None
@@ -101,7 +108,7 @@ class BorrowerManager:
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """
             cursor.execute(query, (card_id, ssn_clean, name, fname, lname, email, address, phone))
-            conn.commit()
+            commit(conn, session)
             cursor.close()
             
             print(f"[BORROWER] Successfully created borrower with Card ID: {card_id}")
@@ -109,15 +116,15 @@ class BorrowerManager:
         
         except Error as e:
             print(f"[BORROWER] Database error: {str(e)}")
-            conn.rollback()
+            rollback(conn, session)
             return False, f"Database error: {str(e)}", None
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_borrower(card_id):
+    def get_borrower(card_id, session=None):
         # Retrieve borrower information by card ID
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return None
         
@@ -131,32 +138,145 @@ class BorrowerManager:
             print(f"[DB ERROR] Failed to retrieve borrower: {e}")
             return None
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
+    
+    @staticmethod
+    def parse(search_term):
+        # (free_text, [(field, value, is_phrase)]); a bare Card_id or SSN is
+        # treated as card: / ssn:
+        free_text, scoped = parse_query(search_term, BorrowerManager.FIELDS)
+        if not scoped and is_card_id(free_text):
+            return "", [('card', free_text.strip(), False)]
+        if not scoped and is_ssn(free_text):
+            return "", [('ssn', free_text.strip(), False)]
+        return free_text, scoped
+    
+    @staticmethod
+    def field_clause(field, value):
+        # Equality on a full Card_id/SSN, otherwise a prefix on the indexed column
+        if field == 'card':
+            card_id = value.upper()
+            if is_card_id(card_id):
+                return "br.Card_id = %s", (card_id,)
+            return "br.Card_id LIKE %s", (f"{escape_like(card_id)}%",)
+        if field == 'ssn':
+            ssn = value.replace('-', '')
+            if is_ssn(ssn):
+                return "br.Ssn = %s", (ssn,)
+            return "br.Ssn LIKE %s", (f"{escape_like(ssn)}%",)
+        return "br.Bname LIKE %s", (f"{escape_like(value)}%",)
+    
+    @staticmethod
+    def match_clause(search_term):
+        # Returns (WHERE fragment, params). Free text matches name, SSN or card
+        # ID anywhere; scoped terms are ANDed with it.
+        free_text, scoped = BorrowerManager.parse(search_term)
+        clauses = []
+        params = ()
+        for field, value, _ in scoped:
+            where, field_params = BorrowerManager.field_clause(field, value)
+            clauses.append(where)
+            params += field_params
+        if free_text.strip() or not scoped:
+            pattern = f"%{unquote(free_text)}%"
+            clauses.append("(br.Bname LIKE %s OR br.Ssn LIKE %s OR br.Card_id LIKE %s)")
+            params += (pattern, pattern, pattern)
+        return " AND ".join(clauses), params
+    
+    @staticmethod
+    def search_sql(include_fines=False, paged=False, where=None):
+        # Borrowers matching `where` (default: name/SSN/card ID LIKE);
+        # paged adds the Card_id keyset + LIMIT
+        fines_column = ""
+        if include_fines:
+            fines_column = """,
+                (SELECT COALESCE(SUM(f.Fine_amt), 0)
+                 FROM LOAN l
+                 JOIN FINE f ON f.Loan_id = l.Loan_id
+                 WHERE l.Card_id = br.Card_id AND f.Paid = FALSE) AS Unpaid_total"""
+        where = where or "br.Bname LIKE %s OR br.Ssn LIKE %s OR br.Card_id LIKE %s"
+        keyset = "AND br.Card_id > %s" if paged else ""
+        order = "ORDER BY br.Card_id LIMIT %s" if paged else "ORDER BY br.Bname"
+        return f"""
+            SELECT br.*{fines_column}
+            FROM BORROWER br
+            WHERE ({where}) {keyset}
+            {order}
+        """
     
     @staticmethod
-    def search_borrowers(search_term):
+    def add_fine_status(rows):
+        for row in rows:
+            row['Unpaid_total'] = Decimal(str(row['Unpaid_total']))
+            row['Has_fines'] = row['Unpaid_total'] > 0
+        return rows
+    
+    @staticmethod
+    def search_borrowers(search_term, include_fines=False, session=None):
         # Search borrowers by name or SSN
-        conn = get_connection()
+        # include_fines adds Unpaid_total / Has_fines per row in the same query
+        conn = get_connection(session)
         if not conn:
             return []
         
         try:
             cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT * FROM BORROWER
-                WHERE Bname LIKE %s OR Ssn LIKE %s OR Card_id LIKE %s
-                ORDER BY Bname
-            """
-            search_pattern = f"%{search_term}%"
-            cursor.execute(query, (search_pattern, search_pattern, search_pattern))
+            where, params = BorrowerManager.match_clause(search_term)
+            cursor.execute(BorrowerManager.search_sql(include_fines, where=where), params)
             results = cursor.fetchall()
             cursor.close()
+            if include_fines:
+                BorrowerManager.add_fine_status(results)
             return results
         except Error as e:
             print(f"[DB ERROR] Failed to search borrowers: {e}")
             return []
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
+    
+    @staticmethod
+    def search_borrowers_page(search_term, page_size=PAGE_SIZE, after=None,
+                              with_total=False, include_fines=False, session=None,
+                              canceller=None):
+        # One page of matching borrowers ordered by Card_id; pass the returned
+        # next_cursor as `after` to get the following page. A QueryCanceller
+        # lets the caller stop the query while it runs.
+        page = make_page([], page_size, 'Card_id')
+        conn = get_connection(session)
+        if not conn:
+            return page
+        if canceller and not canceller.attach(conn):
+            close_connection(conn, session=session)
+            return page
+        
+        where, params = BorrowerManager.match_clause(search_term)
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            query = BorrowerManager.search_sql(include_fines, paged=True, where=where)
+            cursor.execute(query, params + (after or "", page_size + 1))
+            page = make_page(cursor.fetchall(), page_size, 'Card_id')
+            cursor.close()
+            if include_fines:
+                BorrowerManager.add_fine_status(page['rows'])
+            
+            if with_total:
+                cursor = conn.cursor()
+                page['total'], page['total_is_estimate'] = count_capped(
+                    cursor,
+                    f"SELECT 1 FROM BORROWER br WHERE {where}",
+                    params, BorrowerManager.COUNT_CAP
+                )
+                cursor.close()
+            return page
+        except Error as e:
+            if not (canceller and canceller.cancelled):
+                print(f"[DB ERROR] Failed to search borrowers: {e}")
+            return page
+        finally:
+            if canceller:
+                canceller.detach()
+            close_connection(conn, session=session)
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
@@ -5,7 +5,7 @@ import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db.database import get_connection, close_connection
+from db.database import get_connection, close_connection, commit, rollback
 
 
 class FinesManager:
@@ -16,6 +16,7 @@ class FinesManager:
     """
     
     FINE_RATE_PER_DAY = Decimal('0.25')
+    BULK_LOOKUP_CHUNK = 1000
     
     @staticmethod
     def calculate_days_late(due_date, return_date=None):
@@ -36,9 +37,49 @@ class FinesManager:
     def calculate_fine_amount(days_late):
         return Decimal(days_late) * FinesManager.FINE_RATE_PER_DAY
     
+    MODE_INCREMENTAL = 'incremental'
+    MODE_FULL = 'full'
+    
+    @staticmethod
+    def late_loans_query(since=None):
+        # Late loans: still out past the due date, or returned after it.
+        # With a watermark only loans returned on/after that date are rescanned;
+        # fines for loans returned earlier can no longer change.
+        if since is None:
+            returned_filter = "(Date_in IS NOT NULL AND Date_in > Date_due)"
+            params = (FinesManager.FINE_RATE_PER_DAY,)
+        else:
+            returned_filter = "(Date_in >= %s AND Date_in > Date_due)"
+            params = (FinesManager.FINE_RATE_PER_DAY, since)
+        
+        sql = f"""
+            SELECT
+                Loan_id,
+                DATEDIFF(IFNULL(Date_in, CURDATE()), Date_due) * %s AS Fine_amt
+            FROM LOAN
+            WHERE
+                (Date_in IS NULL AND Date_due < CURDATE())
+                OR {returned_filter}
+        """
+        return sql, params
+    
+    @staticmethod
+    def get_watermark(cursor):
+        # Date of the last successful fines run, or None if there has not been one
+        cursor.execute("SELECT Last_run FROM FINE_WATERMARK WHERE Id = 1 FOR UPDATE")
+        row = cursor.fetchone()
+        return row['Last_run'] if row else None
+    
     @staticmethod
-    def update_fines():
-        conn = get_connection()
+    def update_fines(mode=MODE_INCREMENTAL, session=None):
+        # Set-based: days late and amounts are computed in SQL and all fines are
+        # upserted in one statement instead of a SELECT + INSERT/UPDATE per loan.
+        # 'incremental' only touches loans still out or returned since the last run;
+        # 'full' rescans the whole LOAN history for reconciliation.
+        if mode not in (FinesManager.MODE_INCREMENTAL, FinesManager.MODE_FULL):
+            return False, f"Unknown fines update mode: {mode}", {}
+        
+        conn = get_connection(session)
         if not conn:
             return False, "Failed to connect to database", {}
         
@@ -52,74 +93,61 @@ class FinesManager:
         try:
             cursor = conn.cursor(dictionary=True)
             
-            # Find all late loans
-            # Case 1: Books returned late (Date_in > Date_due)
-            # Case 2: Books still out and overdue (Date_in IS NULL AND Date_due < TODAY)
-            query = """
-                SELECT 
-                    Loan_id,
-                    Date_due,
-                    Date_in
-                FROM LOAN
-                WHERE 
-                    (Date_in IS NOT NULL AND Date_in > Date_due)
-                    OR (Date_in IS NULL AND Date_due < CURDATE())
+            since = None
+            if mode == FinesManager.MODE_INCREMENTAL:
+                since = FinesManager.get_watermark(cursor)
+                if since is None:
+                    # No previous run recorded - fall back to a full rebuild
+                    mode = FinesManager.MODE_FULL
+            stats['mode'] = mode
+            late_sql, params = FinesManager.late_loans_query(since)
+            
+            # Classify every late loan against its existing fine (if any) in one pass
+            stats_query = f"""
+                SELECT
+                    COUNT(*) AS total_processed,
+                    COALESCE(SUM(f.Loan_id IS NULL), 0) AS new_fines,
+                    COALESCE(SUM(f.Paid = FALSE AND f.Fine_amt <> late.Fine_amt), 0) AS updated_fines,
+                    COALESCE(SUM(f.Paid = TRUE), 0) AS skipped_paid
+                FROM ({late_sql}) AS late
+                LEFT JOIN FINE f ON f.Loan_id = late.Loan_id
             """
+            cursor.execute(stats_query, params)
+            counts = cursor.fetchone()
+            for key in ('new_fines', 'updated_fines', 'skipped_paid', 'total_processed'):
+                stats[key] = int(counts[key] or 0)
+            
+            # Insert missing fines and refresh unpaid ones; paid fines are left untouched
+            upsert_query = f"""
+                INSERT INTO FINE (Loan_id, Fine_amt, Paid)
+                SELECT late.Loan_id, late.Fine_amt, FALSE
+                FROM ({late_sql}) AS late
+                ON DUPLICATE KEY UPDATE
+                    FINE.Fine_amt = IF(FINE.Paid, FINE.Fine_amt, late.Fine_amt)
+            """
+            cursor.execute(upsert_query, params)
             
-            cursor.execute(query)
-            late_loans = cursor.fetchall()
-            stats['total_processed'] = len(late_loans)
-            
-            for loan in late_loans:
-                loan_id = loan['Loan_id']
-                due_date = loan['Date_due']
-                date_in = loan['Date_in']
-                
-                # Calculate days late and fine amount
-                days_late = FinesManager.calculate_days_late(due_date, date_in)
-                fine_amount = FinesManager.calculate_fine_amount(days_late)
-                
-                # Check if fine already exists
-                cursor.execute("SELECT Loan_id, Paid, Fine_amt FROM FINE WHERE Loan_id = %s", (loan_id,))
-                existing_fine = cursor.fetchone()
-                
-                if existing_fine:
-                    # Fine exists
-                    if existing_fine['Paid']:
-                        # Already paid, skip
-                        stats['skipped_paid'] += 1
-                    else:
-                        # Not paid, update if amount changed
-                        current_amount = Decimal(str(existing_fine['Fine_amt']))
-                        if current_amount != fine_amount:
-                            cursor.execute(
-                                "UPDATE FINE SET Fine_amt = %s WHERE Loan_id = %s",
-                                (fine_amount, loan_id)
-                            )
-                            stats['updated_fines'] += 1
-                else:
-                    # No fine exists, create new one
-                    cursor.execute(
-                        "INSERT INTO FINE (Loan_id, Fine_amt, Paid) VALUES (%s, %s, FALSE)",
-                        (loan_id, fine_amount)
-                    )
-                    stats['new_fines'] += 1
-            
-            conn.commit()
+            # Record the watermark in the same transaction as the fines
+            cursor.execute("""
+                INSERT INTO FINE_WATERMARK (Id, Last_run) VALUES (1, CURDATE())
+                ON DUPLICATE KEY UPDATE Last_run = CURDATE()
+            """)
+            
+            commit(conn, session)
             cursor.close()
             
-            message = f"Fines updated: {stats['new_fines']} new, {stats['updated_fines']} updated, {stats['skipped_paid']} paid (skipped)"
+            message = f"Fines updated ({mode}): {stats['new_fines']} new, {stats['updated_fines']} updated, {stats['skipped_paid']} paid (skipped)"
             return True, message, stats
             
         except Error as e:
-            conn.rollback()
+            rollback(conn, session)
             return False, f"Database error: {str(e)}", stats
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_borrower_fines(card_id, include_paid=False):
-        conn = get_connection()
+    def get_borrower_fines(card_id, include_paid=False, session=None):
+        conn = get_connection(session)
         if not conn:
             return None
         
@@ -171,11 +199,11 @@ class FinesManager:
             print(f"[FINES ERROR] Failed to get borrower fines: {e}")
             return None
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_all_unpaid_fines():
-        conn = get_connection()
+    def get_all_unpaid_fines(session=None):
+        conn = get_connection(session)
         if not conn:
             return []
         
@@ -208,11 +236,11 @@ class FinesManager:
             print(f"[FINES ERROR] Failed to get unpaid fines: {e}")
             return []
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def pay_fines(card_id):
-        conn = get_connection()
+    def pay_fines(card_id, session=None):
+        conn = get_connection(session)
         if not conn:
             return False, "Failed to connect to database", None
         
@@ -262,20 +290,20 @@ class FinesManager:
             cursor.execute(update_query, (card_id,))
             rows_updated = cursor.rowcount
             
-            conn.commit()
+            commit(conn, session)
             cursor.close()
             
             return True, f"Payment successful: ${total_unpaid} paid", total_unpaid
             
         except Error as e:
-            conn.rollback()
+            rollback(conn, session)
             return False, f"Database error: {str(e)}", None
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def has_unpaid_fines(card_id):
-        conn = get_connection()
+    def has_unpaid_fines(card_id, session=None):
+        conn = get_connection(session)
         if not conn:
             return False
         
@@ -299,7 +327,48 @@ class FinesManager:
             print(f"[FINES ERROR] Failed to check unpaid fines: {e}")
             return False
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
+
+
+    @staticmethod
+    def get_unpaid_fine_totals(card_ids, session=None):
+        # Unpaid fine totals for many borrowers in one query: {card_id: Decimal}
+        # Borrowers without unpaid fines are included with a total of 0.00
+        card_ids = list(dict.fromkeys(card_ids))
+        totals = {card_id: Decimal('0.00') for card_id in card_ids}
+        if not card_ids:
+            return totals
+        
+        conn = get_connection(session)
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            # Chunk the IN list so huge result sets don't exceed packet limits
+            for start in range(0, len(card_ids), FinesManager.BULK_LOOKUP_CHUNK):
+                chunk = card_ids[start:start + FinesManager.BULK_LOOKUP_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                query = f"""
+                    SELECT l.Card_id, SUM(f.Fine_amt) AS Total_unpaid
+                    FROM FINE f
+                    JOIN LOAN l ON f.Loan_id = l.Loan_id
+                    WHERE l.Card_id IN ({placeholders}) AND f.Paid = FALSE
+                    GROUP BY l.Card_id
+                """
+                cursor.execute(query, chunk)
+                for row in cursor.fetchall():
+                    totals[row['Card_id']] = Decimal(str(row['Total_unpaid']))
+            
+            cursor.close()
+            return totals
+            
+        except Error as e:
+            print(f"[FINES ERROR] Failed to get unpaid fine totals: {e}")
+            return None
+        finally:
+            close_connection(conn, session=session)
 
 
 # Command-line interface for running fines operations
@@ -309,6 +378,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Library Fines Management System')
     parser.add_argument('action', choices=['update', 'view-unpaid'],
                        help='Action to perform: update (calculate fines) or view-unpaid (show report)')
+    parser.add_argument('--full', action='store_true',
+                       help='Rescan all loan history instead of only loans changed since the last run')
     
     args = parser.parse_args()
     
@@ -318,7 +389,8 @@ if __name__ == "__main__":
         print("=" * 70)
         print()
         
-        success, message, stats = FinesManager.update_fines()
+        mode = FinesManager.MODE_FULL if args.full else FinesManager.MODE_INCREMENTAL
+        success, message, stats = FinesManager.update_fines(mode)
         
         print()
         print("-" * 70)
@@ -328,6 +400,7 @@ if __name__ == "__main__":
         if success:
             print(f"✓ Update completed successfully")
             print()
+            print(f"Mode:                  {stats['mode']}")
             print(f"Total loans processed: {stats['total_processed']}")
             print(f"New fines created:     {stats['new_fines']}")
             print(f"Existing fines updated: {stats['updated_fines']}")
@@ -1,5 +1,10 @@
-from app.db.database import get_connection, close_connection
 from datetime import date, timedelta
+from mysql.connector import IntegrityError
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import get_connection, close_connection, commit, rollback, make_page, count_capped
 
 
 class LoanManager:
@@ -8,84 +13,254 @@ class LoanManager:
     
     MAX_ACTIVE_LOANS = 3
     LOAN_DURATION_DAYS = 14
+    PAGE_SIZE = 50
+    COUNT_CAP = 10000
+    
+    # Every checkout rule evaluated by a single statement
+    ELIGIBILITY_SQL = """
+        SELECT
+            EXISTS (SELECT 1 FROM BORROWER WHERE Card_id = %s) AS borrower_exists,
+            (SELECT COUNT(*) FROM ACTIVE_LOAN WHERE Card_id = %s) AS loan_count,
+            EXISTS (SELECT 1 FROM ACTIVE_LOAN WHERE Isbn = %s) AS book_out,
+            (SELECT SUM(f.Fine_amt)
+             FROM FINE f JOIN LOAN l ON f.Loan_id = l.Loan_id
+             WHERE l.Card_id = %s AND f.Paid = FALSE) AS unpaid
+    """
+    
+    @staticmethod
+    def fetch_eligibility(cursor, isbn: str, card_id: str) -> dict:
+        # Outcome of every checkout rule for (isbn, card_id); needs a dictionary cursor
+        cursor.execute(LoanManager.ELIGIBILITY_SQL, (card_id, card_id, isbn, card_id))
+        return cursor.fetchone()
+    
+    @staticmethod
+    def eligibility_error(outcome: dict, card_id: str):
+        # First failed rule as a user-facing message (same order as the old
+        # one-query-per-rule checks), or None if the checkout is allowed
+        if not outcome["borrower_exists"]:
+            return f"Borrower {card_id} does not exist."
+        if outcome["loan_count"] >= LoanManager.MAX_ACTIVE_LOANS:
+            return f"Borrower already has maximum {LoanManager.MAX_ACTIVE_LOANS} active loans."
+        if outcome["book_out"]:
+            return "Book is currently checked out."
+        unpaid = outcome["unpaid"]
+        if unpaid and unpaid > 0:
+            return f"Borrower has unpaid fines: ${unpaid:.2f}"
+        return None
+    
+    @staticmethod
+    def check_eligibility(isbn: str, card_id: str, session=None):
+        # Returns (allowed, message) without checking the book out
+        conn = get_connection(session)
+        if not conn:
+            return False, "Database connection failed."
+        
+        cursor = conn.cursor(dictionary=True)
+        try:
+            error = LoanManager.eligibility_error(
+                LoanManager.fetch_eligibility(cursor, isbn, card_id), card_id
+            )
+            return error is None, error or "Checkout allowed."
+        except Exception as e:
+            return False, f"Eligibility check failed: {e}"
+        finally:
+            close_connection(conn, cursor, session)
     
     @staticmethod
-    def checkout_book(isbn: str, card_id: str) -> str:
+    def checkout_book(isbn: str, card_id: str, session=None) -> str:
         # Attempts to checkout a book to a borrower
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return "Database connection failed."
         
         cursor = conn.cursor(dictionary=True)
         
         try:
-            # 1) Verify borrower exists
-            cursor.execute("SELECT * FROM BORROWER WHERE Card_id = %s", (card_id,))
-            borrower = cursor.fetchone()
-            if not borrower:
-                return f"Borrower {card_id} does not exist."
-            
-            # 2) Check active loans < MAX_ACTIVE_LOANS
-            cursor.execute("""
-                SELECT COUNT(*) AS loan_count 
-                FROM LOAN 
-                WHERE Card_id = %s AND Date_in IS NULL
-            """, (card_id,))
-            loan_count = cursor.fetchone()["loan_count"]
-            if loan_count >= LoanManager.MAX_ACTIVE_LOANS:
-                return f"Borrower already has maximum {LoanManager.MAX_ACTIVE_LOANS} active loans."
-            
-            # 3) Check if book already checked out
-            cursor.execute("""
-                SELECT * FROM LOAN
-                WHERE Isbn = %s AND Date_in IS NULL
-            """, (isbn,))
-            if cursor.fetchone():
-                return "Book is currently checked out."
-            
-            # 4) Check unpaid fines
-            cursor.execute("""
-                SELECT SUM(Fine_amt) AS total
-                FROM FINE JOIN LOAN USING(Loan_id)
-                WHERE Card_id = %s AND Paid = FALSE
-            """, (card_id,))
-            unpaid = cursor.fetchone()["total"]
-            if unpaid and unpaid > 0:
-                return f"Borrower has unpaid fines: ${unpaid:.2f}"
-            
-            # 5) Create loan record
-            cursor.execute("SELECT IFNULL(MAX(Loan_id),0)+1 AS next_id FROM LOAN")
-            next_id = cursor.fetchone()["next_id"]
+            # 1) Borrower exists, active loans, availability and fines in one round trip
+            error = LoanManager.eligibility_error(
+                LoanManager.fetch_eligibility(cursor, isbn, card_id), card_id
+            )
+            if error:
+                return error
             
+            # 2) Create loan record (Loan_id is AUTO_INCREMENT, so concurrent desks never collide)
             today = date.today()
             due = today + timedelta(days=LoanManager.LOAN_DURATION_DAYS)
             
             cursor.execute("""
-                INSERT INTO LOAN (Loan_id, Isbn, Card_id, Date_out, Date_due, Date_in)
-                VALUES (%s, %s, %s, %s, %s, NULL)
-            """, (next_id, isbn, card_id, today, due))
+                INSERT INTO LOAN (Isbn, Card_id, Date_out, Date_due, Date_in)
+                VALUES (%s, %s, %s, %s, NULL)
+            """, (isbn, card_id, today, due))
+            loan_id = cursor.lastrowid
+            
+            # Availability is tracked in ACTIVE_LOAN in the same transaction;
+            # its primary key on Isbn also stops two desks lending the same copy
+            try:
+                cursor.execute("""
+                    INSERT INTO ACTIVE_LOAN (Isbn, Loan_id, Card_id)
+                    VALUES (%s, %s, %s)
+                """, (isbn, loan_id, card_id))
+            except IntegrityError:
+                rollback(conn, session)
+                return "Book is currently checked out."
             
-            conn.commit()
+            commit(conn, session)
             return f"SUCCESS — Book {isbn} checked out to {card_id}. Due {due}"
         
         except Exception as e:
-            conn.rollback()
+            rollback(conn, session)
             return f"Checkout failed: {e}"
         
         finally:
-            close_connection(conn, cursor)
+            close_connection(conn, cursor, session)
     
     @staticmethod
-    def search_active_loans(query: str):
-       # Returns all currently checked-out loans where the ISBN, Card_id, or Borrower Name matches the search substring
-        conn = get_connection()
+    def checkout_books(pairs, session=None):
+        # Checks out many (isbn, card_id) pairs at once: the rules are validated
+        # set-wise in two queries, all loans are inserted with executemany in one
+        # transaction, and a result dict is returned per pair (in input order).
+        # Keys are upper-cased to match the case-insensitive collation.
+        pairs = [(isbn.strip().upper(), card_id.strip().upper()) for isbn, card_id in pairs]
+        results = [
+            {'isbn': isbn, 'card_id': card_id, 'success': False,
+             'message': '', 'loan_id': None, 'due': None}
+            for isbn, card_id in pairs
+        ]
+        if not pairs:
+            return results
+        
+        conn = get_connection(session)
         if not conn:
-            return []
+            for result in results:
+                result['message'] = "Database connection failed."
+            return results
         
         cursor = conn.cursor(dictionary=True)
-        q = f"%{query}%"
         
-        sql = """
+        try:
+            card_ids = list(dict.fromkeys(card_id for _, card_id in pairs))
+            isbns = list(dict.fromkeys(isbn for isbn, _ in pairs))
+            
+            # 1) Borrower existence, active loan counts and unpaid fines for every card
+            placeholders = ", ".join(["%s"] * len(card_ids))
+            cursor.execute(f"""
+                SELECT
+                    br.Card_id,
+                    (SELECT COUNT(*) FROM ACTIVE_LOAN al WHERE al.Card_id = br.Card_id) AS loan_count,
+                    (SELECT SUM(f.Fine_amt)
+                     FROM FINE f JOIN LOAN l ON f.Loan_id = l.Loan_id
+                     WHERE l.Card_id = br.Card_id AND f.Paid = FALSE) AS unpaid
+                FROM BORROWER br
+                WHERE br.Card_id IN ({placeholders})
+            """, card_ids)
+            borrowers = {row['Card_id'].upper(): row for row in cursor.fetchall()}
+            
+            # 2) Existence and availability of every book
+            placeholders = ", ".join(["%s"] * len(isbns))
+            cursor.execute(f"""
+                SELECT b.Isbn, al.Isbn IS NOT NULL AS book_out
+                FROM BOOK b
+                LEFT JOIN ACTIVE_LOAN al ON al.Isbn = b.Isbn
+                WHERE b.Isbn IN ({placeholders})
+            """, isbns)
+            books = {row['Isbn'].upper(): row['book_out'] for row in cursor.fetchall()}
+            
+            # 3) Apply the rules in order, counting loans granted earlier in the batch
+            today = date.today()
+            due = today + timedelta(days=LoanManager.LOAN_DURATION_DAYS)
+            granted_per_card = {}
+            taken_isbns = set()
+            approved = []
+            
+            for result in results:
+                isbn, card_id = result['isbn'], result['card_id']
+                borrower = borrowers.get(card_id)
+                if isbn not in books and borrower:
+                    result['message'] = f"Book {isbn} does not exist."
+                    continue
+                
+                outcome = {
+                    'borrower_exists': borrower is not None,
+                    'loan_count': (borrower['loan_count'] if borrower else 0)
+                                  + granted_per_card.get(card_id, 0),
+                    'book_out': books.get(isbn) or isbn in taken_isbns,
+                    'unpaid': borrower['unpaid'] if borrower else None,
+                }
+                error = LoanManager.eligibility_error(outcome, card_id)
+                if error:
+                    result['message'] = error
+                    continue
+                
+                granted_per_card[card_id] = granted_per_card.get(card_id, 0) + 1
+                taken_isbns.add(isbn)
+                approved.append(result)
+            
+            if not approved:
+                return results
+            
+            # 4) Insert every approved loan, then mirror them into ACTIVE_LOAN
+            cursor.executemany("""
+                INSERT INTO LOAN (Isbn, Card_id, Date_out, Date_due, Date_in)
+                VALUES (%s, %s, %s, %s, NULL)
+            """, [(r['isbn'], r['card_id'], today, due) for r in approved])
+            
+            # The multi-row insert reports the first Loan_id it generated, so
+            # reading back from there finds only this batch's loans (never an
+            # older open LOAN row for the same book)
+            first_loan_id = cursor.lastrowid
+            placeholders = ", ".join(["%s"] * len(approved))
+            cursor.execute(f"""
+                SELECT Loan_id, Isbn, Card_id
+                FROM LOAN
+                WHERE Loan_id >= %s
+                  AND Isbn IN ({placeholders})
+                  AND Date_out = %s
+                  AND Date_in IS NULL
+            """, [first_loan_id] + [r['isbn'] for r in approved] + [today])
+            loan_ids = {
+                (row['Isbn'].upper(), row['Card_id'].upper()): row['Loan_id']
+                for row in cursor.fetchall()
+            }
+            
+            try:
+                cursor.executemany("""
+                    INSERT INTO ACTIVE_LOAN (Isbn, Loan_id, Card_id)
+                    VALUES (%s, %s, %s)
+                """, [(r['isbn'], loan_ids[(r['isbn'], r['card_id'])], r['card_id']) for r in approved])
+            except IntegrityError:
+                # Another desk checked out one of these books meanwhile
+                rollback(conn, session)
+                for r in approved:
+                    r['message'] = "Batch rolled back: a book was checked out concurrently. Please retry."
+                return results
+            
+            commit(conn, session)
+            
+            for r in approved:
+                r['success'] = True
+                r['loan_id'] = loan_ids[(r['isbn'], r['card_id'])]
+                r['due'] = due
+                r['message'] = f"SUCCESS — Book {r['isbn']} checked out to {r['card_id']}. Due {due}"
+            return results
+        
+        except Exception as e:
+            rollback(conn, session)
+            for result in results:
+                result['success'] = False
+                result['loan_id'] = None
+                result['due'] = None
+                result['message'] = f"Checkout failed: {e}"
+            return results
+        
+        finally:
+            close_connection(conn, cursor, session)
+    
+    @staticmethod
+    def search_active_loans_sql(paged=False):
+        # Active loans matching ISBN/card ID/borrower name; paged adds the Loan_id keyset + LIMIT
+        keyset = "AND l.Loan_id > %s" if paged else ""
+        order = "ORDER BY l.Loan_id LIMIT %s" if paged else "ORDER BY l.Date_out"
+        return f"""
             SELECT 
                 l.Loan_id,
                 l.Isbn,
@@ -94,33 +269,80 @@ class LoanManager:
                 br.Bname,
                 l.Date_out,
                 l.Date_due
-            FROM LOAN l
-            JOIN BOOK b      ON l.Isbn = b.Isbn
-            JOIN BORROWER br ON l.Card_id = br.Card_id
-            WHERE l.Date_in IS NULL
-              AND (b.Isbn LIKE %s
+            FROM ACTIVE_LOAN al
+            JOIN LOAN l      ON l.Loan_id = al.Loan_id
+            JOIN BOOK b      ON al.Isbn = b.Isbn
+            JOIN BORROWER br ON al.Card_id = br.Card_id
+            WHERE (b.Isbn LIKE %s
                 OR br.Card_id LIKE %s
                 OR br.Bname LIKE %s)
-            ORDER BY l.Date_out
+              {keyset}
+            {order}
         """
+    
+    @staticmethod
+    def search_active_loans(query: str, session=None):
+       # Returns all currently checked-out loans where the ISBN, Card_id, or Borrower Name matches the search substring
+        conn = get_connection(session)
+        if not conn:
+            return []
+        
+        cursor = conn.cursor(dictionary=True)
+        q = f"%{query}%"
         
         try:
-            cursor.execute(sql, (q, q, q))
+            cursor.execute(LoanManager.search_active_loans_sql(), (q, q, q))
             rows = cursor.fetchall()
             return rows
         except Exception as e:
             print(f"[LOAN SEARCH ERROR] {e}")
             return []
         finally:
-            close_connection(conn, cursor)
+            close_connection(conn, cursor, session)
     
     @staticmethod
-    def checkin_loans(loan_ids):
+    def search_active_loans_page(query: str, page_size: int = PAGE_SIZE, after: int = None,
+                                 with_total: bool = False, session=None):
+        # One page of active loans ordered by Loan_id; pass the returned
+        # next_cursor as `after` to get the following page
+        page = make_page([], page_size, 'Loan_id')
+        conn = get_connection(session)
+        if not conn:
+            return page
+        
+        cursor = conn.cursor(dictionary=True)
+        q = f"%{query}%"
+        
+        try:
+            sql = LoanManager.search_active_loans_sql(paged=True)
+            cursor.execute(sql, (q, q, q, after or 0, page_size + 1))
+            page = make_page(cursor.fetchall(), page_size, 'Loan_id')
+            
+            if with_total:
+                count_cursor = conn.cursor()
+                page['total'], page['total_is_estimate'] = count_capped(
+                    count_cursor, """
+                        SELECT 1
+                        FROM ACTIVE_LOAN al
+                        JOIN BORROWER br ON al.Card_id = br.Card_id
+                        WHERE al.Isbn LIKE %s OR br.Card_id LIKE %s OR br.Bname LIKE %s
+                    """, (q, q, q), LoanManager.COUNT_CAP
+                )
+                count_cursor.close()
+            return page
+        except Exception as e:
+            print(f"[LOAN SEARCH ERROR] {e}")
+            return page
+        finally:
+            close_connection(conn, cursor, session)
+    
+    @staticmethod
+    def checkin_loans(loan_ids, session=None):
         # Marks the given loan IDs as returned (sets Date_in to today)
         if not loan_ids:
             return "No loans selected."
         
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return "Database connection failed."
         
@@ -139,23 +361,30 @@ class LoanManager:
             
             params = [today] + loan_ids
             cursor.execute(sql, params)
-            conn.commit()
+            checked_in = cursor.rowcount
+            
+            # Keep availability in sync in the same transaction
+            cursor.execute(
+                f"DELETE FROM ACTIVE_LOAN WHERE Loan_id IN ({placeholders})",
+                loan_ids
+            )
+            commit(conn, session)
             
-            if cursor.rowcount == 0:
+            if checked_in == 0:
                 return "Nothing was checked in (maybe already checked in?)."
             
-            return f"SUCCESS — {cursor.rowcount} loan(s) checked in."
+            return f"SUCCESS — {checked_in} loan(s) checked in."
         
         except Exception as e:
-            conn.rollback()
+            rollback(conn, session)
             return f"Check-in failed: {e}"
         finally:
-            close_connection(conn, cursor)
+            close_connection(conn, cursor, session)
     
     @staticmethod
-    def verify_borrower_exists(card_id: str) -> bool:
+    def verify_borrower_exists(card_id: str, session=None) -> bool:
         # Check if a borrower exists in the system
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return False
         
@@ -168,12 +397,12 @@ class LoanManager:
         except Exception:
             return False
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_active_loan_count(card_id: str) -> int:
+    def get_active_loan_count(card_id: str, session=None) -> int:
         # Get the number of active loans for a borrower
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return -1
         
@@ -181,8 +410,8 @@ class LoanManager:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT COUNT(*) AS count
-                FROM LOAN
-                WHERE Card_id = %s AND Date_in IS NULL
+                FROM ACTIVE_LOAN
+                WHERE Card_id = %s
             """, (card_id,))
             result = cursor.fetchone()
             cursor.close()
@@ -190,20 +419,20 @@ class LoanManager:
         except Exception:
             return -1
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def is_book_available(isbn: str) -> bool:
+    def is_book_available(isbn: str, session=None) -> bool:
         # Check if a book is available (not currently checked out)
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return False
         
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT 1 FROM LOAN
-                WHERE Isbn = %s AND Date_in IS NULL
+                SELECT 1 FROM ACTIVE_LOAN
+                WHERE Isbn = %s
             """, (isbn,))
             available = cursor.fetchone() is None
             cursor.close()
@@ -211,12 +440,12 @@ class LoanManager:
         except Exception:
             return False
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_unpaid_fines_total(card_id: str) -> float:
+    def get_unpaid_fines_total(card_id: str, session=None) -> float:
         # Get the total amount of unpaid fines for a borrower
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return -1.0
         
@@ -234,12 +463,12 @@ class LoanManager:
         except Exception:
             return -1.0
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_loan_details(loan_id: int):
+    def get_loan_details(loan_id: int, session=None):
         # Retrieves detailed information about a specific loan.
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return None
         
@@ -268,12 +497,12 @@ class LoanManager:
             print(f"[LOAN ERROR] Failed to get loan details: {e}")
             return None
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def is_loan_checked_in(loan_id: int) -> bool:
+    def is_loan_checked_in(loan_id: int, session=None) -> bool:
         # Check if a loan has already been checked in.
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return False
         
@@ -288,12 +517,12 @@ class LoanManager:
         except Exception:
             return False
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_active_loans_for_borrower(card_id: str):
+    def get_active_loans_for_borrower(card_id: str, session=None):
         # Get all active (not yet returned) loans for a specific borrower.
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return []
         
@@ -306,9 +535,10 @@ class LoanManager:
                     b.Title,
                     l.Date_out,
                     l.Date_due
-                FROM LOAN l
-                JOIN BOOK b ON l.Isbn = b.Isbn
-                WHERE l.Card_id = %s AND l.Date_in IS NULL
+                FROM ACTIVE_LOAN al
+                JOIN LOAN l ON l.Loan_id = al.Loan_id
+                JOIN BOOK b ON al.Isbn = b.Isbn
+                WHERE al.Card_id = %s
                 ORDER BY l.Date_due
             """
             cursor.execute(sql, (card_id,))
@@ -319,12 +549,12 @@ class LoanManager:
             print(f"[LOAN ERROR] Failed to get active loans: {e}")
             return []
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
     
     @staticmethod
-    def get_loan_by_isbn(isbn: str):
+    def get_loan_by_isbn(isbn: str, session=None):
         # Get active loan information for a specific book by ISBN.
-        conn = get_connection()
+        conn = get_connection(session)
         if not conn:
             return None
         
@@ -340,11 +570,11 @@ class LoanManager:
                     l.Date_out,
                     l.Date_due,
                     l.Date_in
-                FROM LOAN l
-                JOIN BOOK b ON l.Isbn = b.Isbn
-                JOIN BORROWER br ON l.Card_id = br.Card_id
-                WHERE l.Isbn = %s AND l.Date_in IS NULL
-                LIMIT 1
+                FROM ACTIVE_LOAN al
+                JOIN LOAN l ON l.Loan_id = al.Loan_id
+                JOIN BOOK b ON al.Isbn = b.Isbn
+                JOIN BORROWER br ON al.Card_id = br.Card_id
+                WHERE al.Isbn = %s
             """
             cursor.execute(sql, (isbn,))
             result = cursor.fetchone()
@@ -354,17 +584,58 @@ class LoanManager:
             print(f"[LOAN ERROR] Failed to get loan by ISBN: {e}")
             return None
         finally:
-            close_connection(conn)
+            close_connection(conn, session=session)
 
-if __name__ == "__main__":
-    import sys
+def benchmark_eligibility(isbn, card_id, iterations=200):
+    # Compares the old one-query-per-rule checks with the single eligibility
+    # query on the same connection, so only round trips and query cost differ.
+    # Read-only; returns {"sequential_ms": ..., "combined_ms": ...} per checkout.
+    import time
     
+    sequential = [
+        ("SELECT * FROM BORROWER WHERE Card_id = %s", (card_id,)),
+        ("SELECT COUNT(*) AS loan_count FROM ACTIVE_LOAN WHERE Card_id = %s", (card_id,)),
+        ("SELECT 1 FROM ACTIVE_LOAN WHERE Isbn = %s", (isbn,)),
+        ("""SELECT SUM(Fine_amt) AS total
+            FROM FINE JOIN LOAN USING(Loan_id)
+            WHERE Card_id = %s AND Paid = FALSE""", (card_id,)),
+    ]
+    
+    conn = get_connection()
+    if not conn:
+        return None
+    
+    cursor = conn.cursor(dictionary=True)
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for sql, params in sequential:
+                cursor.execute(sql, params)
+                cursor.fetchall()
+        sequential_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for _ in range(iterations):
+            LoanManager.fetch_eligibility(cursor, isbn, card_id)
+        combined_s = time.perf_counter() - start
+    finally:
+        close_connection(conn, cursor)
+    
+    return {
+        "sequential_ms": sequential_s * 1000 / iterations,
+        "combined_ms": combined_s * 1000 / iterations,
+    }
+
+if __name__ == "__main__":
     # No args -> show usage
     if len(sys.argv) == 1:
         print("Usage:")
         print("  python -m app.services.loan_manager checkout <ISBN> <CARD_ID>")
         print("  python -m app.services.loan_manager search <term>")
         print("  python -m app.services.loan_manager checkin <loan_id1> [loan_id2] ...")
+        print("  python -m app.services.loan_manager checkout-batch <ISBN:CARD_ID> [ISBN:CARD_ID] ...")
+        print("  python -m app.services.loan_manager checkout-batch --file <pairs.csv>")
+        print("  python -m app.services.loan_manager bench-checkout <ISBN> <CARD_ID> [iterations]")
         sys.exit(0)
     
     cmd = sys.argv[1].lower()
@@ -411,9 +682,64 @@ if __name__ == "__main__":
         
         print(LoanManager.checkin_loans(loan_ids))
     
+    elif cmd == "checkout-batch":
+        if len(sys.argv) < 3:
+            print("Usage: python -m app.services.loan_manager checkout-batch <ISBN:CARD_ID> [ISBN:CARD_ID] ...")
+            print("       python -m app.services.loan_manager checkout-batch --file <pairs.csv>")
+            sys.exit(1)
+        
+        pairs = []
+        if sys.argv[2] == "--file":
+            if len(sys.argv) < 4:
+                print("Usage: python -m app.services.loan_manager checkout-batch --file <pairs.csv>")
+                sys.exit(1)
+            import csv
+            # CSV with ISBN,CARD_ID per line; an optional header row is skipped
+            with open(sys.argv[3], newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if len(row) < 2 or row[0].strip().lower() == "isbn":
+                        continue
+                    pairs.append((row[0], row[1]))
+        else:
+            for arg in sys.argv[2:]:
+                if ":" not in arg:
+                    print(f"Invalid pair {arg!r}; expected ISBN:CARD_ID")
+                    sys.exit(1)
+                isbn, card_id = arg.split(":", 1)
+                pairs.append((isbn, card_id))
+        
+        results = LoanManager.checkout_books(pairs)
+        for r in results:
+            if r['success']:
+                print(f"OK    {r['isbn']} -> {r['card_id']} (Loan_id={r['loan_id']}, Due={r['due']})")
+            else:
+                print(f"FAIL  {r['isbn']} -> {r['card_id']}: {r['message']}")
+        
+        succeeded = sum(1 for r in results if r['success'])
+        print(f"\n{succeeded} of {len(results)} checkout(s) succeeded")
+    
+    elif cmd == "bench-checkout":
+        if len(sys.argv) < 4:
+            print("Usage: python -m app.services.loan_manager bench-checkout <ISBN> <CARD_ID> [iterations]")
+            sys.exit(1)
+        
+        iterations = int(sys.argv[4]) if len(sys.argv) > 4 else 200
+        result = benchmark_eligibility(sys.argv[2], sys.argv[3], iterations)
+        if not result:
+            print("Database connection failed.")
+            sys.exit(1)
+        
+        print(f"Eligibility checks over {iterations} iterations:")
+        print(f"  Sequential (4 queries): {result['sequential_ms']:.3f} ms/checkout")
+        print(f"  Combined (1 query):     {result['combined_ms']:.3f} ms/checkout")
+        if result['combined_ms'] > 0:
+            print(f"  Speedup:                {result['sequential_ms'] / result['combined_ms']:.2f}x")
+    
     else:
         print("Unknown command:", cmd)
         print("Usage:")
         print("  python -m app.services.loan_manager checkout <ISBN> <CARD_ID>")
         print("  python -m app.services.loan_manager search <term>")
         print("  python -m app.services.loan_manager checkin <loan_id1> [loan_id2] ...")
+        print("  python -m app.services.loan_manager checkout-batch <ISBN:CARD_ID> [ISBN:CARD_ID] ...")
+        print("  python -m app.services.loan_manager bench-checkout <ISBN> <CARD_ID> [iterations]")
@@ -0,0 +1,77 @@
+import re
+from typing import List, Tuple
+
+# Field-scoped search syntax shared by BookSearchManager and BorrowerManager:
+#
+#   isbn:0439136350   title:"the hobbit"   author:tolkien   card:ID000123   ssn:123-45-6789
+#
+# Scoped terms become equality/prefix predicates on indexed columns; anything
+# else is free text and keeps the usual match-anywhere search.
+
+TERM = re.compile(r'(?:(?P<field>[A-Za-z]+):)?(?:"(?P<phrase>[^"]*)"?|(?P<word>\S+))')
+
+ISBN10 = re.compile(r'^\d{9}[\dX]$')
+ISBN13 = re.compile(r'^97[89]\d{10}$')
+CARD_ID = re.compile(r'^ID\d{6}$', re.IGNORECASE)
+SSN = re.compile(r'^\d{3}-?\d{2}-?\d{4}$')
+
+
+def parse_query(text: str, fields) -> Tuple[str, List[Tuple[str, str, bool]]]:
+    """
+    Splits a search string into (free_text, [(field, value, is_phrase)]).
+
+        parse_query('title:"the hobbit" tolkien', ('isbn', 'title', 'author'))
+        -> ('tolkien', [('title', 'the hobbit', True)])
+
+    Prefixes not in `fields` (e.g. the "Wars:" in a title) stay free text.
+    A quoted phrase without a field keeps its quotes in the free text, so it
+    can be matched as a phrase (see unquote() for substring matching).
+    A string with no scoped terms or quotes is returned unchanged as free text.
+    """
+    free = []
+    scoped = []
+    for match in TERM.finditer(text):
+        field = (match.group('field') or '').lower()
+        phrase = match.group('phrase')
+        value = phrase if phrase is not None else match.group('word')
+        if field and field not in fields:
+            free.append(match.group(0).replace('"', ''))
+        elif field:
+            if value.strip():
+                scoped.append((field, value.strip(), phrase is not None))
+        elif phrase is not None and phrase.strip():
+            free.append(f'"{phrase.strip()}"')
+        elif value.strip():
+            free.append(value.strip())
+
+    if not scoped and '"' not in text:
+        return text, []
+    return " ".join(free), scoped
+
+
+def unquote(text: str) -> str:
+    # Free text with the quotes of bare phrases removed
+    return text.replace('"', '')
+
+
+def normalize_isbn(value: str) -> str:
+    # Strips hyphens/spaces and converts an ISBN-13 (978 prefix) to the
+    # ISBN-10 stored in BOOK.Isbn
+    isbn = re.sub(r'[\s-]', '', value).upper()
+    if ISBN13.match(isbn) and isbn.startswith('978'):
+        core = isbn[3:12]
+        check = (11 - sum((10 - i) * int(d) for i, d in enumerate(core)) % 11) % 11
+        isbn = core + ('X' if check == 10 else str(check))
+    return isbn
+
+
+def is_isbn(value: str) -> bool:
+    return bool(ISBN10.match(normalize_isbn(value.strip())))
+
+
+def is_card_id(value: str) -> bool:
+    return bool(CARD_ID.match(value.strip()))
+
+
+def is_ssn(value: str) -> bool:
+    return bool(SSN.match(value.strip()))
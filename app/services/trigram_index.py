@@ -0,0 +1,314 @@
+from mysql.connector import Error
+from array import array
+from bisect import bisect_left
+from typing import List, Dict
+import threading
+import unicodedata
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import get_connection, close_connection, catalog_version
+
+
+def fold(text: str) -> str:
+    # Case- and accent-insensitive form, like the tables' *_ai_ci collation
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def contains(postings, doc_id) -> bool:
+    # Membership test on an ascending posting list
+    i = bisect_left(postings, doc_id)
+    return i < len(postings) and postings[i] == doc_id
+
+
+def intersect(posting_lists) -> List[int]:
+    # Walks the shortest list and probes the others, so the cost follows the
+    # rarest trigram rather than the catalog size
+    posting_lists = sorted(posting_lists, key=len)
+    candidates = list(posting_lists[0])
+    for postings in posting_lists[1:]:
+        candidates = [d for d in candidates if contains(postings, d)]
+        if not candidates:
+            break
+    return candidates
+
+
+class TrigramData:
+    """
+    One build of the trigram index: per-book arrays indexed by doc id, the
+    posting lists, and what the build has seen of the catalog.
+
+    refresh() only appends to the current build (fields first, postings
+    last), so searches on other threads never see a doc id whose fields are
+    missing. A rebuild fills a new TrigramData and swaps it in whole.
+    """
+
+    def __init__(self, version=None):
+        self.isbns = []
+        self.titles = []
+        self.authors = []     # doc id -> [author names]
+        self.folded = []      # doc id -> (isbn, title, *names), folded
+        self.doc_ids = {}     # Isbn -> doc id
+        self.postings = {}    # trigram -> array of doc ids, ascending
+        self.watermark = None  # newest BOOK.Added_at indexed
+        self.version = version  # CATALOG_VERSION the build started from
+
+    def add_books(self, rows):
+        # rows: (Isbn, Title, Added_at, Name) with one row per author;
+        # books already indexed are skipped
+        books = {}
+        for isbn, title, added_at, name in rows:
+            if isbn in self.doc_ids:
+                continue
+            book = books.setdefault(isbn, [title, []])
+            if name is not None and name not in book[1]:
+                book[1].append(name)
+            if self.watermark is None or added_at > self.watermark:
+                self.watermark = added_at
+
+        for isbn, (title, names) in books.items():
+            doc_id = len(self.isbns)
+            fields = (fold(isbn), fold(title)) + tuple(fold(name) for name in names)
+            self.isbns.append(isbn)
+            self.titles.append(title)
+            self.authors.append(names)
+            self.folded.append(fields)
+            self.doc_ids[isbn] = doc_id
+
+            grams = set()
+            for field in fields:
+                grams |= trigrams(field)
+            for gram in grams:
+                postings = self.postings.get(gram)
+                if postings is None:
+                    self.postings[gram] = array('I', [doc_id])
+                else:
+                    postings.append(doc_id)
+        return len(books)
+
+
+class TrigramIndex:
+    """
+    In-process trigram index over BOOK.Isbn, BOOK.Title and AUTHOR.Name.
+
+    Gives the same matches as the substring search (LIKE '%q%' on any of the
+    three fields) without scanning: the posting lists of the query's
+    trigrams are intersected, and only those candidates are checked with a
+    real substring test. Queries shorter than three characters fall back to
+    checking every book in memory.
+
+    The index is loaded on first use. refresh() adds books added since (by
+    BOOK.Added_at), or rebuilds the index when the importer has changed the
+    catalog (CATALOG_VERSION moved), since updates, deletes and newly linked
+    authors can't be found by Added_at. Availability is always read from
+    ACTIVE_LOAN, since it changes with every checkout.
+    """
+
+    STATUS_CHUNK = 1000
+
+    BOOKS_SQL = """
+        SELECT b.Isbn, b.Title, b.Added_at, a.Name
+        FROM BOOK b
+        LEFT JOIN BOOK_AUTHOR ba ON ba.Isbn = b.Isbn
+        LEFT JOIN AUTHOR a ON a.Author_id = ba.Author_id
+    """
+
+    _data = TrigramData()
+    _loaded = False
+    _lock = threading.Lock()   # one load/refresh at a time
+
+    @staticmethod
+    def build(conn) -> TrigramData:
+        # A complete new build from the whole catalog. The version is read
+        # first, so a change made during the read triggers another rebuild.
+        data = TrigramData(catalog_version(conn))
+        cursor = conn.cursor()
+        cursor.execute(TrigramIndex.BOOKS_SQL + " ORDER BY b.Isbn")
+        rows = cursor.fetchall()
+        cursor.close()
+        data.add_books(rows)
+        return data
+
+    @staticmethod
+    def load(session=None):
+        # Builds the index from the whole catalog; returns (success, message)
+        cls = TrigramIndex
+        with cls._lock:
+            if cls._loaded:
+                return True, "Already loaded"
+            conn = get_connection(session)
+            if not conn:
+                return False, "Failed to connect to database"
+            try:
+                data = cls.build(conn)
+            except Error as e:
+                print(f"[DB ERROR] Failed to load trigram index: {e}")
+                return False, f"Database error: {str(e)}"
+            finally:
+                close_connection(conn, session=session)
+
+            cls._data = data
+            cls._loaded = True
+            return True, f"Indexed {len(data.isbns)} books ({len(data.postings)} trigrams)"
+
+    @staticmethod
+    def refresh(session=None):
+        # Adds books added since the last load/refresh, or rebuilds after the
+        # importer changed the catalog. Does nothing until the index has been
+        # loaded by a search.
+        cls = TrigramIndex
+        if not cls._loaded:
+            return True, "Not loaded"
+
+        with cls._lock:
+            data = cls._data
+            conn = get_connection(session)
+            if not conn:
+                return False, "Failed to connect to database"
+            try:
+                if catalog_version(conn) != data.version:
+                    rebuilt = cls.build(conn)
+                else:
+                    rebuilt = None
+                    cursor = conn.cursor()
+                    cursor.execute(cls.BOOKS_SQL + " WHERE b.Added_at >= %s",
+                                   (data.watermark or '1970-01-01',))
+                    rows = cursor.fetchall()
+                    cursor.close()
+            except Error as e:
+                print(f"[DB ERROR] Failed to refresh trigram index: {e}")
+                return False, f"Database error: {str(e)}"
+            finally:
+                close_connection(conn, session=session)
+
+            if rebuilt is not None:
+                cls._data = rebuilt
+                return True, f"Catalog changed, rebuilt with {len(rebuilt.isbns)} books"
+            count = data.add_books(rows)
+            return True, f"Added {count} books"
+
+    @staticmethod
+    def match_isbns(query_str: str, session=None) -> List[str]:
+        # Sorted ISBNs of books with query_str in the Isbn, Title or an author Name
+        cls = TrigramIndex
+        if not cls._loaded:
+            success, _ = cls.load(session)
+            if not success:
+                return []
+
+        # One build throughout, even if a rebuild is swapped in meanwhile
+        data = cls._data
+        q = fold(query_str)
+        grams = trigrams(q)
+        if grams:
+            posting_lists = [data.postings.get(gram) for gram in grams]
+            if not all(posting_lists):
+                return []
+            candidates = intersect(posting_lists)
+        else:
+            candidates = range(len(data.folded))
+
+        folded = data.folded
+        return sorted(data.isbns[d] for d in candidates if any(q in field for field in folded[d]))
+
+    @staticmethod
+    def book_fields(isbn: str) -> Dict:
+        # Isbn, Title and Authors of an indexed book, without touching MySQL;
+        # None if a rebuild since match_isbns() dropped the book
+        data = TrigramIndex._data
+        doc_id = data.doc_ids.get(isbn)
+        if doc_id is None:
+            return None
+        names = data.authors[doc_id]
+        return {
+            'Isbn': isbn,
+            'Title': data.titles[doc_id],
+            'Authors': ", ".join(names) if names else None,
+        }
+
+    @staticmethod
+    def status_sql(count: int) -> str:
+        # Which of `count` ISBNs are checked out
+        placeholders = ", ".join(["%s"] * count)
+        return f"SELECT Isbn FROM ACTIVE_LOAN WHERE Isbn IN ({placeholders})"
+
+    @staticmethod
+    def book_rows(isbns: List[str], session=None) -> List[Dict]:
+        # Search-result rows (Isbn, Title, Authors, Status) for indexed ISBNs,
+        # with the status read from ACTIVE_LOAN
+        cls = TrigramIndex
+        if not isbns:
+            return []
+
+        out = set()
+        conn = get_connection(session)
+        if conn:
+            try:
+                cursor = conn.cursor()
+                for start in range(0, len(isbns), cls.STATUS_CHUNK):
+                    chunk = isbns[start:start + cls.STATUS_CHUNK]
+                    cursor.execute(cls.status_sql(len(chunk)), chunk)
+                    out.update(row[0] for row in cursor.fetchall())
+                cursor.close()
+            except Error as e:
+                print(f"[DB ERROR] Failed to read book availability: {e}")
+            finally:
+                close_connection(conn, session=session)
+
+        rows = []
+        for isbn in isbns:
+            row = cls.book_fields(isbn)
+            if row is None:
+                continue
+            row['Status'] = 'OUT' if isbn in out else 'IN'
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def search(query_str: str, session=None) -> List[Dict]:
+        return TrigramIndex.book_rows(TrigramIndex.match_isbns(query_str, session), session)
+
+    @staticmethod
+    def stats() -> dict:
+        data = TrigramIndex._data
+        return {
+            'books': len(data.isbns),
+            'trigrams': len(data.postings),
+            'postings': sum(len(p) for p in data.postings.values()),
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        print("Usage:")
+        print("  python -m app.services.trigram_index <search_query> [--verify]")
+        print("\nExample:")
+        print("  python -m app.services.trigram_index 3613 --verify")
+        sys.exit(0)
+
+    verify = "--verify" in sys.argv
+    query = " ".join(arg for arg in sys.argv[1:] if arg != "--verify")
+
+    started = time.perf_counter()
+    success, message = TrigramIndex.load()
+    print(f"{message} in {time.perf_counter() - started:.2f}s")
+    if not success:
+        sys.exit(1)
+
+    started = time.perf_counter()
+    isbns = TrigramIndex.match_isbns(query)
+    print(f"{len(isbns)} match(es) for {query!r} in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    if verify:
+        # Same query through the SQL substring search, for comparison
+        from services.book_search import BookSearchManager
+        expected = sorted(row['Isbn'] for row in BookSearchManager.search(query, BookSearchManager.MODE_SUBSTRING))
+        print("Matches the SQL substring search" if expected == isbns else
+              f"MISMATCH: SQL substring search returned {len(expected)} book(s)")
@@ -1,25 +1,61 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QLineEdit, QTableWidget, QTableWidgetItem, QTableView,
     QAbstractItemView, QStackedWidget, QDialog, QScrollArea, QSplitter,
-    QMessageBox, QCheckBox, QGroupBox
+    QMessageBox, QCheckBox, QGroupBox, QCompleter
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QStringListModel
 from PyQt6.QtGui import QAction
 from decimal import Decimal
 
 sys.path.insert(0, '..')
-from services.book_search import BookSearchManager
 from services.borrower_manager import BorrowerManager
 from services.fine import FinesManager
 from services.loan_manager import LoanManager
+from services.autocomplete import AutocompleteManager
+from services.trigram_index import TrigramIndex
+from db.database import Session
+from ui.workers import TaskRunner
+from ui.models import BookTableModel, BorrowerTableModel
+
+# Search-as-you-type on the Books page: wait this long after the last
+# keystroke, and only search once the text is this long
+SEARCH_DEBOUNCE_MS = 300
+MIN_SEARCH_CHARS = 3
+
+# How often the in-memory search indexes pick up newly imported books
+INDEX_REFRESH_MS = 5 * 60 * 1000
+
+def checkout_in_session(isbn, card_id):
+    # Checkout as one unit of work (runs on a worker thread)
+    try:
+        with Session() as session:
+            return LoanManager.checkout_book(isbn, card_id, session=session)
+    except Exception as e:
+        return f"Checkout failed: {e}"
+
+def checkin_in_session(loan_ids):
+    # Check-in as one unit of work (runs on a worker thread)
+    try:
+        with Session() as session:
+            return LoanManager.checkin_loans(loan_ids, session=session)
+    except Exception as e:
+        return f"Check-in failed: {e}"
+
+def refresh_search_indexes():
+    # Tops up the in-memory indexes with newly added books, or rebuilds them
+    # after the importer changed the catalog (runs on a worker thread); the
+    # trigram index is only refreshed once a search has loaded it
+    AutocompleteManager.refresh()
+    TrigramIndex.refresh()
 
 class FinesDialog(QDialog):
     def __init__(self, card_id, borrower_name, parent=None):
         super().__init__(parent)
         self.card_id = card_id
         self.borrower_name = borrower_name
+        self.tasks = TaskRunner(self)
         self.init_ui()
         self.load_fines()
     
@@ -85,10 +121,16 @@ class FinesDialog(QDialog):
         self.setLayout(layout)
     
     def load_fines(self):
-        # Load and display fines for the borrower
+        # Load fines for the borrower in the background
         include_paid = self.show_paid_checkbox.isChecked()
-        fines_info = FinesManager.get_borrower_fines(self.card_id, include_paid)
-        
+        self.tasks.run(
+            "fines", FinesManager.get_borrower_fines, self.card_id, include_paid,
+            on_result=self.show_fines,
+            on_error=lambda message: QMessageBox.warning(self, "Error", f"Failed to load fines\n{message}")
+        )
+    
+    def show_fines(self, fines_info):
+        # Display the loaded fines
         if not fines_info:
             QMessageBox.warning(self, "Error", "Failed to load fines")
             return
@@ -141,8 +183,21 @@ class FinesDialog(QDialog):
         if reply == QMessageBox.StandardButton.No:
             return
         
-        # Process payment
-        success, message, amount = FinesManager.pay_fines(self.card_id)
+        # Process payment in the background
+        self.pay_button.setEnabled(False)
+        self.tasks.run(
+            "pay", FinesManager.pay_fines, self.card_id,
+            on_result=self.on_payment_done,
+            on_error=self.on_payment_failed
+        )
+    
+    def on_payment_failed(self, message):
+        self.pay_button.setEnabled(True)
+        QMessageBox.critical(self, "Payment Failed", message)
+    
+    def on_payment_done(self, result):
+        self.pay_button.setEnabled(True)
+        success, message, amount = result
         
         if success:
             QMessageBox.information(
@@ -159,6 +214,7 @@ class AllFinesDialog(QDialog):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.tasks = TaskRunner(self)
         self.init_ui()
         self.load_all_fines()
     
@@ -205,9 +261,15 @@ class AllFinesDialog(QDialog):
         self.setLayout(layout)
     
     def load_all_fines(self):
-        # Load and display all unpaid fines.
-        unpaid_fines = FinesManager.get_all_unpaid_fines()
-        
+        # Load all unpaid fines in the background.
+        self.tasks.run(
+            "fines", FinesManager.get_all_unpaid_fines,
+            on_result=self.show_all_fines,
+            on_error=lambda message: QMessageBox.warning(self, "Error", f"Failed to load fines\n{message}")
+        )
+    
+    def show_all_fines(self, unpaid_fines):
+        # Display all unpaid fines.
         self.fines_table.setRowCount(len(unpaid_fines))
         
         total_system_fines = Decimal('0.00')
@@ -367,6 +429,7 @@ class UserSelectionDialog(QDialog):
     def __init__(self, isbn=None, parent=None):
         super().__init__(parent)
         self.isbn = isbn
+        self.tasks = TaskRunner(self)
         self.init_ui()
 
     def init_ui(self):
@@ -402,14 +465,14 @@ class UserSelectionDialog(QDialog):
         view_fines_button = QPushButton("View Fines")
         view_fines_button.clicked.connect(self.on_view_fines)
         
-        select_button = QPushButton("Select")
-        select_button.clicked.connect(self.on_select)
+        self.select_button = QPushButton("Select")
+        self.select_button.clicked.connect(self.on_select)
         cancel_button = QPushButton("Cancel")
         cancel_button.clicked.connect(self.reject)
         
         button_layout.addWidget(view_fines_button)
         button_layout.addStretch()
-        button_layout.addWidget(select_button)
+        button_layout.addWidget(self.select_button)
         button_layout.addWidget(cancel_button)
         layout.addLayout(button_layout)
 
@@ -418,10 +481,18 @@ class UserSelectionDialog(QDialog):
     def on_search(self):
         query = self.search_input.text()
         if not query.strip():
+            self.tasks.cancel("search")
             self.results_table.setRowCount(0)
             return
 
-        results = BorrowerManager.search_borrowers(query)
+        # Fine status comes back inline with the search results (one round trip)
+        self.tasks.run(
+            "search", BorrowerManager.search_borrowers, query, include_fines=True,
+            on_result=self.show_results,
+            on_error=lambda message: QMessageBox.warning(self, "Search Failed", message)
+        )
+
+    def show_results(self, results):
         self.results_table.setRowCount(len(results))
 
         for row, borrower in enumerate(results):
@@ -429,8 +500,7 @@ class UserSelectionDialog(QDialog):
             self.results_table.setItem(row, 1, QTableWidgetItem(borrower['Card_id']))
             self.results_table.setItem(row, 2, QTableWidgetItem(borrower['Email'] or ''))
             
-            # Check for unpaid fines
-            has_fines = FinesManager.has_unpaid_fines(borrower['Card_id'])
+            has_fines = borrower['Has_fines']
             fines_item = QTableWidgetItem("Yes" if has_fines else "No")
             if has_fines:
                 fines_item.setForeground(Qt.GlobalColor.red)
@@ -464,8 +534,19 @@ class UserSelectionDialog(QDialog):
         card_id = self.results_table.item(selected_row, 1).text()
         borrower_name = self.results_table.item(selected_row, 0).text()
         
-        result = LoanManager.checkout_book(self.isbn, card_id)
-        
+        self.select_button.setEnabled(False)
+        self.tasks.run(
+            "checkout", checkout_in_session, self.isbn, card_id,
+            on_result=lambda result: self.on_checkout_done(result, borrower_name),
+            on_error=self.on_checkout_failed
+        )
+
+    def on_checkout_failed(self, message):
+        self.select_button.setEnabled(True)
+        QMessageBox.critical(self, "Checkout Failed", message)
+
+    def on_checkout_done(self, result, borrower_name):
+        self.select_button.setEnabled(True)
         if "SUCCESS" in result:
             QMessageBox.information(self, "Checkout Successful", f"{result}\n\nBorrower: {borrower_name}")
             self.accept()
@@ -475,8 +556,21 @@ class UserSelectionDialog(QDialog):
 class LibraryApp(QMainWindow):
     def __init__(self):
         super().__init__()
+        # Service calls run on a thread pool so the window never freezes
+        self.tasks = TaskRunner(self)
+        self.tasks.busy_changed.connect(
+            lambda busy: self.statusBar().showMessage("Working..." if busy else "")
+        )
         self.init_ui()
 
+        # Suggestions are built once in the background, then the in-memory
+        # indexes are topped up with newly imported books on a timer
+        self.refresh_indexes()
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(INDEX_REFRESH_MS)
+        self.index_timer.timeout.connect(self.refresh_indexes)
+        self.index_timer.start()
+
     def init_ui(self):
         self.setWindowTitle("Library Management System")
         self.setGeometry(100, 100, 1280, 720)
@@ -543,8 +637,12 @@ class LibraryApp(QMainWindow):
         fines_menu.addAction(view_all_fines_action)
         
         update_fines_action = QAction("Update Fines", self)
-        update_fines_action.triggered.connect(self.update_fines)
+        update_fines_action.triggered.connect(lambda: self.update_fines())
         fines_menu.addAction(update_fines_action)
+        
+        rebuild_fines_action = QAction("Rebuild All Fines", self)
+        rebuild_fines_action.triggered.connect(lambda: self.update_fines(full=True))
+        fines_menu.addAction(rebuild_fines_action)
 
     def create_books_page(self):
         page = QWidget()
@@ -554,15 +652,38 @@ class LibraryApp(QMainWindow):
         search_layout = QHBoxLayout()
         search_label = QLabel("Search:")
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Enter book title, author, or ISBN...")
+        self.search_input.setPlaceholderText('Enter book title, author, or ISBN... (or isbn: title:"..." author:)')
         self.search_input.returnPressed.connect(self.on_search)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
         search_button = QPushButton("Search")
         search_button.clicked.connect(self.on_search)
+        self.search_as_you_type = QCheckBox("Search as you type")
+        self.search_as_you_type.setChecked(True)
+        self.best_matches_first = QCheckBox("Best matches first")
+        self.best_matches_first.setChecked(True)
+        self.best_matches_first.toggled.connect(self.on_ranking_toggled)
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(search_button)
+        search_layout.addWidget(self.search_as_you_type)
+        search_layout.addWidget(self.best_matches_first)
         layout.addLayout(search_layout)
 
+        # Restarted on every keystroke; fires once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.on_incremental_search)
+
+        # Title and author suggestions, answered from memory as the user types
+        self.completion_model = QStringListModel(self)
+        self.completer = QCompleter(self.completion_model, self)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.setFilterMode(Qt.MatchFlag.MatchContains)  # last-name hits are mid-string
+        self.completer.setMaxVisibleItems(AutocompleteManager.SUGGESTION_LIMIT)
+        self.search_input.setCompleter(self.completer)
+        self.search_input.textEdited.connect(self.on_search_text_edited)
+
         # Results display with detail panel
         results_label = QLabel("Results:")
         layout.addWidget(results_label)
@@ -572,14 +693,19 @@ class LibraryApp(QMainWindow):
         splitter.setStretchFactor(0, 2)
         splitter.setStretchFactor(1, 1)
 
-        # Left side: Results table
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(4)
-        self.results_table.setHorizontalHeaderLabels(["Title", "ISBN", "Authors", "Status"])
-        self.results_table.resizeColumnsToContents()
+        # Left side: Results table - the model holds the rows and fetches the
+        # next page when the view scrolls to the end
+        self.book_model = BookTableModel(self.tasks, "books", self)
+        self.book_model.ranked = self.best_matches_first.isChecked()
+        self.book_model.loaded.connect(self.on_books_loaded)
+        self.book_model.failed.connect(lambda message: QMessageBox.warning(self, "Search Failed", message))
+        self.book_model.modelReset.connect(self.on_book_selected)
+
+        self.results_table = QTableView()
+        self.results_table.setModel(self.book_model)
         self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.results_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-        self.results_table.itemSelectionChanged.connect(self.on_book_selected)
+        self.results_table.selectionModel().selectionChanged.connect(lambda *_: self.on_book_selected())
         splitter.addWidget(self.results_table)
 
         # Right side: Detail panel
@@ -587,6 +713,14 @@ class LibraryApp(QMainWindow):
         splitter.addWidget(self.detail_panel)
 
         layout.addWidget(splitter, 1)
+
+        # Result count - more pages load as the table is scrolled
+        paging_layout = QHBoxLayout()
+        self.books_count_label = QLabel("")
+        paging_layout.addWidget(self.books_count_label)
+        paging_layout.addStretch()
+        layout.addLayout(paging_layout)
+
         page.setLayout(layout)
         return page
 
@@ -611,16 +745,16 @@ class LibraryApp(QMainWindow):
         return panel
 
     def on_book_selected(self):
-        selected_row = self.results_table.currentRow()
+        selected_row = self.results_table.currentIndex().row()
         if selected_row < 0:
             self.clear_detail_panel()
             return
 
         # Get book data
-        title = self.results_table.item(selected_row, 0).text()
-        isbn = self.results_table.item(selected_row, 1).text()
-        authors = self.results_table.item(selected_row, 2).text()
-        status = self.results_table.item(selected_row, 3).text()
+        title = self.book_model.value(selected_row, 0)
+        isbn = self.book_model.value(selected_row, 1)
+        authors = self.book_model.value(selected_row, 2)
+        status = self.book_model.value(selected_row, 3)
 
         # Clear previous content
         while self.detail_layout.count():
@@ -657,25 +791,37 @@ class LibraryApp(QMainWindow):
         status_label.setStyleSheet("color: red; font-size: 12px;")
         self.detail_layout.addWidget(status_label)
 
-        selected_row = self.results_table.currentRow()
+        selected_row = self.results_table.currentIndex().row()
         if selected_row >= 0:
-            isbn = self.results_table.item(selected_row, 1).text()
-            loan_info = LoanManager.get_loan_by_isbn(isbn)
+            isbn = self.book_model.value(selected_row, 1)
+            self.tasks.run(
+                "loan_detail", LoanManager.get_loan_by_isbn, isbn,
+                on_result=lambda loan_info: self.show_loan_info(isbn, loan_info)
+            )
+
+    def show_loan_info(self, isbn, loan_info):
+        # Ignore the result if another book was selected meanwhile
+        selected_row = self.results_table.currentIndex().row()
+        if selected_row < 0 or self.book_model.value(selected_row, 1) != isbn:
+            return
+        
+        if loan_info:
+            checkout_info = QLabel(
+                f"<b>Loan ID:</b> {loan_info['Loan_id']}<br>"
+                f"<b>Checkout Date:</b> {loan_info['Date_out']}<br>"
+                f"<b>Due Date:</b> {loan_info['Date_due']}<br>"
+                f"<b>Borrower:</b> {loan_info['Bname']}<br>"
+                f"<b>Card ID:</b> {loan_info['Card_id']}"
+            )
+            checkout_info.setWordWrap(True)
             
-            if loan_info:
-                checkout_info = QLabel(
-                    f"<b>Loan ID:</b> {loan_info['Loan_id']}<br>"
-                    f"<b>Checkout Date:</b> {loan_info['Date_out']}<br>"
-                    f"<b>Due Date:</b> {loan_info['Date_due']}<br>"
-                    f"<b>Borrower:</b> {loan_info['Bname']}<br>"
-                    f"<b>Card ID:</b> {loan_info['Card_id']}"
-                )
-                checkout_info.setWordWrap(True)
-                self.detail_layout.addWidget(checkout_info)
-                
-                checkin_button = QPushButton("Check In Book")
-                checkin_button.clicked.connect(lambda: self.on_checkin_book(loan_info['Loan_id']))
-                self.detail_layout.addWidget(checkin_button)
+            checkin_button = QPushButton("Check In Book")
+            checkin_button.clicked.connect(lambda: self.on_checkin_book(loan_info['Loan_id']))
+            
+            # Insert above the trailing stretch added by on_book_selected
+            position = max(0, self.detail_layout.count() - 1)
+            self.detail_layout.insertWidget(position, checkout_info)
+            self.detail_layout.insertWidget(position + 1, checkin_button)
 
     def clear_detail_panel(self):
         while self.detail_layout.count():
@@ -693,8 +839,13 @@ class LibraryApp(QMainWindow):
         if reply == QMessageBox.StandardButton.No:
             return
         
-        result = LoanManager.checkin_loans([loan_id])
-        
+        self.tasks.run(
+            "checkin", checkin_in_session, [loan_id],
+            on_result=self.on_checkin_done,
+            on_error=lambda message: QMessageBox.critical(self, "Check In Failed", message)
+        )
+
+    def on_checkin_done(self, result):
         if "SUCCESS" in result:
             QMessageBox.information(self, "Check In Successful", result)
             self.on_search()
@@ -703,33 +854,67 @@ class LibraryApp(QMainWindow):
             QMessageBox.warning(self, "Check In Failed", result)
 
     def open_user_selection_dialog(self):
-        selected_row = self.results_table.currentRow()
+        selected_row = self.results_table.currentIndex().row()
         if selected_row < 0:
             QMessageBox.warning(self, "No Selection", "Please select a book first")
             return
         
-        isbn = self.results_table.item(selected_row, 1).text()
+        isbn = self.book_model.value(selected_row, 1)
         dialog = UserSelectionDialog(isbn=isbn, parent=self)
         if dialog.exec():
             self.on_search()
             self.on_book_selected()
 
     def on_search(self):
+        # Enter/Search button: always runs a fresh query (also used to refresh
+        # statuses after a checkout or check-in)
+        self.search_timer.stop()
+        self.books_count_label.setText("")
+        self.book_model.search(self.search_input.text())
+
+    def refresh_indexes(self):
+        # Housekeeping: no busy cursor or "Working..." every few minutes
+        self.tasks.run("indexes", refresh_search_indexes, quiet=True)
+
+    def on_search_text_edited(self, text):
+        suggestions = AutocompleteManager.suggest(text)
+        self.completion_model.setStringList([suggestion for suggestion, _ in suggestions])
+        if suggestions:
+            self.completer.complete()
+
+    def on_ranking_toggled(self, checked):
+        # Ranked shows the top matches best first; unranked pages through every match by ISBN
+        self.book_model.ranked = checked
+        if self.book_model.query.strip():
+            self.on_search()
+
+    def on_search_text_changed(self):
+        if self.search_as_you_type.isChecked():
+            self.search_timer.start()
+
+    def on_incremental_search(self):
         query = self.search_input.text()
-        if not query.strip():
-            self.results_table.setRowCount(0)
+        if len(query.strip()) < MIN_SEARCH_CHARS:
+            # Too short to be selective - drop any running search and clear the table
+            if self.book_model.query:
+                self.book_model.search("")
+            self.books_count_label.setText(
+                f"Type at least {MIN_SEARCH_CHARS} characters to search" if query.strip() else ""
+            )
             return
 
-        results = BookSearchManager.search(query)
-        self.results_table.setRowCount(len(results))
-
-        for row, book in enumerate(results):
-            self.results_table.setItem(row, 0, QTableWidgetItem(book['Title']))
-            self.results_table.setItem(row, 1, QTableWidgetItem(book['Isbn']))
-            self.results_table.setItem(row, 2, QTableWidgetItem(book['Authors'] or 'Unknown'))
-            self.results_table.setItem(row, 3, QTableWidgetItem(book['Status']))
+        if query == self.book_model.query:
+            return
+        # Extending a fully loaded query only filters what is already shown;
+        # otherwise a new search supersedes (and kills) the running one
+        if not self.book_model.narrow(query):
+            self.books_count_label.setText("")
+            self.book_model.search(query)
 
-        self.results_table.resizeColumnsToContents()
+    def on_books_loaded(self, first_page):
+        self.books_count_label.setText(self.book_model.status_text())
+        if first_page:
+            self.results_table.resizeColumnsToContents()
 
     def create_users_page(self):
         page = QWidget()
@@ -751,7 +936,7 @@ class LibraryApp(QMainWindow):
         search_layout = QHBoxLayout()
         search_label = QLabel("Search:")
         self.user_search_input = QLineEdit()
-        self.user_search_input.setPlaceholderText("Enter name or card ID...")
+        self.user_search_input.setPlaceholderText("Enter name or card ID... (or card: ssn: name:)")
         self.user_search_input.returnPressed.connect(self.on_user_search)
         search_button = QPushButton("Search")
         search_button.clicked.connect(self.on_user_search)
@@ -760,10 +945,13 @@ class LibraryApp(QMainWindow):
         search_layout.addWidget(search_button)
         layout.addLayout(search_layout)
 
-        # Results table
-        self.user_results_table = QTableWidget()
-        self.user_results_table.setColumnCount(5)
-        self.user_results_table.setHorizontalHeaderLabels(["Name", "Card ID", "Email", "Phone", "Has Fines"])
+        # Results table, backed by a paged model like the books table
+        self.user_model = BorrowerTableModel(self.tasks, "users", self)
+        self.user_model.loaded.connect(self.on_users_loaded)
+        self.user_model.failed.connect(lambda message: QMessageBox.warning(self, "Search Failed", message))
+
+        self.user_results_table = QTableView()
+        self.user_results_table.setModel(self.user_model)
         self.user_results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.user_results_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         layout.addWidget(self.user_results_table)
@@ -774,35 +962,21 @@ class LibraryApp(QMainWindow):
         view_fines_btn.clicked.connect(self.on_view_user_fines)
         button_layout.addWidget(view_fines_btn)
         button_layout.addStretch()
+        self.users_count_label = QLabel("")
+        button_layout.addWidget(self.users_count_label)
         layout.addLayout(button_layout)
 
         page.setLayout(layout)
         return page
 
     def on_user_search(self):
-        query = self.user_search_input.text()
-        if not query.strip():
-            self.user_results_table.setRowCount(0)
-            return
+        self.users_count_label.setText("")
+        self.user_model.search(self.user_search_input.text())
 
-        results = BorrowerManager.search_borrowers(query)
-        self.user_results_table.setRowCount(len(results))
-
-        for row, borrower in enumerate(results):
-            self.user_results_table.setItem(row, 0, QTableWidgetItem(borrower['Bname']))
-            self.user_results_table.setItem(row, 1, QTableWidgetItem(borrower['Card_id']))
-            self.user_results_table.setItem(row, 2, QTableWidgetItem(borrower['Email'] or ''))
-            self.user_results_table.setItem(row, 3, QTableWidgetItem(borrower['PhoneNumber'] or ''))
-            
-            has_fines = FinesManager.has_unpaid_fines(borrower['Card_id'])
-            fines_item = QTableWidgetItem("Yes" if has_fines else "No")
-            if has_fines:
-                fines_item.setForeground(Qt.GlobalColor.red)
-            else:
-                fines_item.setForeground(Qt.GlobalColor.green)
-            self.user_results_table.setItem(row, 4, fines_item)
-
-        self.user_results_table.resizeColumnsToContents()
+    def on_users_loaded(self, first_page):
+        self.users_count_label.setText(self.user_model.status_text())
+        if first_page:
+            self.user_results_table.resizeColumnsToContents()
 
     def on_create_user_from_page(self):
         dialog = CreateUserDialog(self)
@@ -810,13 +984,13 @@ class LibraryApp(QMainWindow):
             self.on_user_search()
 
     def on_view_user_fines(self):
-        selected_row = self.user_results_table.currentRow()
+        selected_row = self.user_results_table.currentIndex().row()
         if selected_row < 0:
             QMessageBox.warning(self, "No Selection", "Please select a user first")
             return
         
-        card_id = self.user_results_table.item(selected_row, 1).text()
-        borrower_name = self.user_results_table.item(selected_row, 0).text()
+        card_id = self.user_model.value(selected_row, 1)
+        borrower_name = self.user_model.value(selected_row, 0)
         
         dialog = FinesDialog(card_id, borrower_name, self)
         dialog.exec()
@@ -826,19 +1000,35 @@ class LibraryApp(QMainWindow):
         dialog = AllFinesDialog(self)
         dialog.exec()
 
-    def update_fines(self):
+    def update_fines(self, full=False):
+        if full:
+            prompt = "This will recalculate fines for the entire loan history.\n\nContinue?"
+        else:
+            prompt = "This will calculate and update all fines in the system.\n\nContinue?"
         reply = QMessageBox.question(
             self, "Update Fines",
-            "This will calculate and update all fines in the system.\n\nContinue?",
+            prompt,
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         
         if reply == QMessageBox.StandardButton.No:
             return
         
-        QMessageBox.information(self, "Processing", "Updating fines... Click OK to continue.")
+        if self.tasks.is_running("update_fines"):
+            QMessageBox.information(self, "Update Fines", "A fines update is already running.")
+            return
         
-        success, message, stats = FinesManager.update_fines()
+        # The batch runs in the background; the window stays usable meanwhile
+        mode = FinesManager.MODE_FULL if full else FinesManager.MODE_INCREMENTAL
+        self.tasks.run(
+            "update_fines", FinesManager.update_fines, mode,
+            on_result=self.on_fines_updated,
+            on_error=lambda message: QMessageBox.critical(self, "Update Failed", f"Failed to update fines:\n{message}")
+        )
+        self.statusBar().showMessage("Updating fines...")
+
+    def on_fines_updated(self, result):
+        success, message, stats = result
         
         if success:
             QMessageBox.information(
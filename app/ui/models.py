@@ -0,0 +1,263 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from services.book_search import BookSearchManager
+from services.borrower_manager import BorrowerManager
+from db.database import QueryCanceller
+
+
+def format_total(page):
+    # "1234" for exact totals, "10000+" when the count was capped
+    if page['total'] is None:
+        return "?"
+    return f"{page['total']}+" if page['total_is_estimate'] else str(page['total'])
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    Read-only table model over keyset-paginated search results.
+
+    Rows are stored as tuples of display strings, and the view only asks
+    for the cells it is drawing. The first page is fetched by search(), and
+    later pages are fetched through canFetchMore/fetchMore as the view
+    scrolls near the end. All fetches run on the TaskRunner; a fetch that is
+    superseded by a new search has its query killed on the server.
+
+    narrow() filters the rows already held instead of querying again, when
+    they are the complete result of a query the new one extends.
+
+    fetch_page(query, after, with_total, canceller) returns one service-layer
+    page (see make_page) and make_row(record) converts one of its dicts into
+    a tuple of display strings; both are required.
+    """
+
+    HEADERS = []
+
+    loaded = pyqtSignal(bool)  # a page was appended (True for the first page)
+    failed = pyqtSignal(str)   # a page fetch raised
+
+    def __init__(self, tasks, channel, fetch_page, make_row, parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        self.channel = channel
+        self._fetch_page = fetch_page
+        self._make_row = make_row
+        self.query = ""
+        self.cursor = None
+        self.total = None  # page['total'] of the first page
+        self.total_text = ""
+        self.loading = False
+        self._rows = []
+        self._generation = 0
+        self._canceller = None
+
+    # --- subclass hooks ---
+
+    def foreground(self, row, column):
+        return None
+
+    def matches(self, row, query):
+        # Whether a held row matches query; None means rows can't be filtered locally
+        return None
+
+    def order(self, rows, query):
+        # The rows kept by narrow(), in the order a new search for query would give
+        return rows
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.foreground(self._rows[index.row()], index.column())
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.cursor is not None and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._fetch(first_page=False)
+
+    # --- search API used by the GUI ---
+
+    def search(self, query):
+        # Replaces the rows with the first page of results for query
+        self._stop_running()
+        self.beginResetModel()
+        self._rows = []
+        self._generation += 1
+        self.query = query
+        self.cursor = None
+        self.total = None
+        self.total_text = ""
+        self.loading = False
+        self.endResetModel()
+
+        if not query.strip():
+            self.tasks.cancel(self.channel)
+            return
+        self._fetch(first_page=True)
+
+    def can_narrow(self, query):
+        # True when every row of the current query is loaded and query only
+        # adds to it, so its results are a subset of the rows held
+        return (bool(self.query.strip()) and bool(self.total_text)
+                and not self.loading and self.cursor is None
+                and query.lower().startswith(self.query.lower()))
+
+    def narrow(self, query):
+        # Filters the held rows down to query; returns False (and does nothing)
+        # when that can't give the same rows as a new search
+        if not self.can_narrow(query):
+            return False
+        rows = []
+        for row in self._rows:
+            match = self.matches(row, query)
+            if match is None:
+                return False
+            if match:
+                rows.append(row)
+
+        self.beginResetModel()
+        self._rows = self.order(rows, query)
+        self._generation += 1
+        self.query = query
+        self.total = len(rows)
+        self.total_text = str(len(rows))
+        self.endResetModel()
+        self.loaded.emit(True)
+        return True
+
+    def value(self, row, column):
+        return self._rows[row][column]
+
+    def status_text(self):
+        if not self.total_text:
+            return ""
+        return f"Showing {len(self._rows)} of {self.total_text}"
+
+    def _stop_running(self):
+        # Kills the server-side query of a fetch whose result is no longer wanted
+        if self.loading and self._canceller:
+            self.tasks.run(f"{self.channel}-cancel", self._canceller.cancel)
+        self._canceller = None
+
+    def _fetch(self, first_page):
+        self.loading = True
+        generation = self._generation
+        self._canceller = QueryCanceller()
+        self.tasks.run(
+            self.channel, self._fetch_page, self.query, self.cursor, first_page, self._canceller,
+            on_result=lambda page: self._append(generation, page, first_page),
+            on_error=lambda message: self._fail(generation, message)
+        )
+
+    def _append(self, generation, page, first_page):
+        if generation != self._generation:
+            return  # result of an earlier search
+        self.loading = False
+        self._canceller = None
+        if first_page:
+            self.total = page['total']
+            self.total_text = format_total(page)
+
+        rows = [self._make_row(record) for record in page['rows']]
+        if rows:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        self.cursor = page['next_cursor']
+        self.loaded.emit(first_page)
+
+    def _fail(self, generation, message):
+        if generation != self._generation:
+            return
+        self.loading = False
+        self._canceller = None
+        self.failed.emit(message)
+
+
+class BookTableModel(PagedTableModel):
+    HEADERS = ["Title", "ISBN", "Authors", "Status"]
+
+    def __init__(self, tasks, channel, parent=None):
+        super().__init__(tasks, channel, self.fetch_books, self.book_row, parent)
+        # Ranked: only the best TOP_K matches, best first, in a single page
+        self.ranked = True
+
+    def fetch_books(self, query, after, with_total, canceller):
+        if self.ranked:
+            return BookSearchManager.search_ranked(query, canceller=canceller)
+        return BookSearchManager.search_page(
+            query, after=after, with_total=with_total, canceller=canceller
+        )
+
+    def book_row(self, book):
+        return (book['Title'], book['Isbn'], book['Authors'] or 'Unknown', book['Status'])
+
+    @staticmethod
+    def row_fields(row):
+        # (isbn, title, authors) of a held row; 'Unknown' is the display text
+        # for a book without authors
+        title, isbn, authors, _ = row
+        return isbn, title, "" if authors == 'Unknown' else authors
+
+    def matches(self, row, query):
+        if self.ranked and self.total != len(self._rows):
+            return None  # the rows held are only the top matches of a larger result
+        if BookSearchManager.has_field_terms(self.query) or BookSearchManager.has_field_terms(query):
+            return None  # field terms are matched by SQL predicates, not substrings
+        if '"' in query:
+            return None  # so are phrases
+        return BookSearchManager.matches(query, *self.row_fields(row))
+
+    def order(self, rows, query):
+        if not self.ranked:
+            return rows
+        # Every match is held, so re-scoring them gives the new query's ranking
+        # (same key as BookSearchManager.top_matches; sorted() keeps ties in order)
+        def rank(row):
+            isbn, title, authors = self.row_fields(row)
+            return BookSearchManager.score(query, isbn, title, authors), -len(title or "")
+        return sorted(rows, key=rank, reverse=True)
+
+
+class BorrowerTableModel(PagedTableModel):
+    HEADERS = ["Name", "Card ID", "Email", "Phone", "Has Fines"]
+
+    def __init__(self, tasks, channel, parent=None):
+        super().__init__(tasks, channel, self.fetch_borrowers, self.borrower_row, parent)
+
+    def fetch_borrowers(self, query, after, with_total, canceller):
+        return BorrowerManager.search_borrowers_page(
+            query, after=after, with_total=with_total, include_fines=True, canceller=canceller
+        )
+
+    def borrower_row(self, borrower):
+        return (
+            borrower['Bname'],
+            borrower['Card_id'],
+            borrower['Email'] or '',
+            borrower['PhoneNumber'] or '',
+            "Yes" if borrower['Has_fines'] else "No",
+        )
+
+    def foreground(self, row, column):
+        if column == 4:
+            return Qt.GlobalColor.red if row[4] == "Yes" else Qt.GlobalColor.green
+        return None
@@ -0,0 +1,117 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import QApplication
+
+
+class WorkerSignals(QObject):
+    # Emitted from the pool thread; delivered on the GUI thread (queued)
+    finished = pyqtSignal(int, object)  # (request_id, result)
+    failed = pyqtSignal(int, str)       # (request_id, error message)
+
+
+class Worker(QRunnable):
+    # Runs one service call on a QThreadPool thread
+
+    def __init__(self, request_id, fn, args, kwargs):
+        super().__init__()
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, result)
+
+
+class TaskRunner(QObject):
+    """
+    Runs service calls in the background and hands results back on the GUI thread.
+
+        self.tasks = TaskRunner(self)
+        self.tasks.run("books", BookSearchManager.search_page, query,
+                       on_result=self.show_books_page)
+
+    Requests are grouped by channel: starting a request on a channel
+    supersedes the one already running there, and the superseded result is
+    dropped when it arrives. A busy cursor is shown while anything is running,
+    except quiet requests (background housekeeping the user didn't ask for).
+    """
+
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._next_id = 0
+        self._latest = {}    # {channel: request_id}
+        self._pending = {}   # {request_id: (channel, worker, on_result, on_error, quiet)}
+
+    def run(self, channel, fn, *args, on_result=None, on_error=None, quiet=False, **kwargs):
+        # Starts fn(*args, **kwargs) on the pool; returns the request id.
+        # quiet requests don't show the busy cursor or emit busy_changed.
+        self._next_id += 1
+        request_id = self._next_id
+
+        worker = Worker(request_id, fn, args, kwargs)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+
+        was_idle = not self.is_busy()
+        self._latest[channel] = request_id
+        self._pending[request_id] = (channel, worker, on_result, on_error, quiet)
+        if was_idle and not quiet:
+            QApplication.setOverrideCursor(Qt.CursorShape.BusyCursor)
+            self.busy_changed.emit(True)
+
+        self.pool.start(worker)
+        return request_id
+
+    def cancel(self, channel):
+        # Drops the result of the running request on channel (the query itself
+        # is left to finish on its pool thread)
+        self._latest.pop(channel, None)
+
+    def is_running(self, channel):
+        request_id = self._latest.get(channel)
+        return request_id is not None and request_id in self._pending
+
+    def is_busy(self):
+        # True while a request the user is waiting on (not quiet) is running
+        return any(not entry[4] for entry in self._pending.values())
+
+    def _complete(self, request_id):
+        # Returns the callbacks if the request is still current, else None
+        entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return None
+        channel, _, on_result, on_error, quiet = entry
+        if not quiet and not self.is_busy():
+            QApplication.restoreOverrideCursor()
+            self.busy_changed.emit(False)
+
+        if self._latest.get(channel) != request_id:
+            return None  # superseded
+        del self._latest[channel]
+        return on_result, on_error
+
+    @pyqtSlot(int, object)
+    def _on_finished(self, request_id, result):
+        callbacks = self._complete(request_id)
+        if callbacks and callbacks[0]:
+            callbacks[0](result)
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, request_id, message):
+        callbacks = self._complete(request_id)
+        if callbacks is None:
+            return
+        if callbacks[1]:
+            callbacks[1](message)
+        else:
+            print(f"[UI ERROR] Background task failed: {message}")
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Disk-backed replacements for the in-memory set/dict the normalization
+# scripts use for de-duplication, so memory stays within a fixed budget no
+# matter how large the feed is.
+#
+# Keys live in a temporary SQLite file. A Bloom filter in front of it answers
+# "definitely new" for most first-time keys without touching the disk, and
+# new keys are buffered and written in batches.
+#
+# memory_mb is the budget of one store and may be fractional, so several
+# stores can split a single budget (see pipeline.run_pipeline).
+
+HASH_COUNT = 7
+WRITE_BATCH = 10000
+# Rough size of one buffered key in the write buffer, for sizing batches
+PENDING_ENTRY_BYTES = 256
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter: no false negatives, tunable false positives."""
+
+    def __init__(self, num_bits, num_hashes=HASH_COUNT):
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = num_hashes
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: h1 + i*h2 from one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def key_text(key):
+    # Tuples such as (author_id, isbn) are stored as one delimited string
+    if isinstance(key, tuple):
+        return "\x1f".join(key)
+    return key
+
+
+class _DiskStore:
+    # Shared SQLite file, Bloom filter and write buffer for DiskSet/DiskDict
+
+    def __init__(self, memory_mb=64, temp_dir=None):
+        budget = int(memory_mb * 1024 * 1024)
+        # Half the budget for the Bloom filter, a quarter for SQLite's page cache;
+        # the rest covers the write buffer
+        self.bloom = BloomFilter(budget // 2 * 8)
+        self.write_batch = max(1, min(WRITE_BATCH, budget // 4 // PENDING_ENTRY_BYTES))
+        if temp_dir:
+            os.makedirs(temp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="dedup-", suffix=".sqlite", dir=temp_dir)
+        os.close(fd)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute(f"PRAGMA cache_size = -{max(1, budget // 4 // 1024)}")
+        self.db.execute("CREATE TABLE entries (k TEXT PRIMARY KEY, v TEXT) WITHOUT ROWID")
+        self.pending = {}
+        self.count = 0
+
+    def lookup(self, text):
+        # (found, value)
+        if text not in self.bloom:
+            return False, None
+        if text in self.pending:
+            return True, self.pending[text]
+        row = self.db.execute("SELECT v FROM entries WHERE k = ?", (text,)).fetchone()
+        return (True, row[0]) if row else (False, None)
+
+    def insert(self, text, value=None):
+        self.bloom.add(text)
+        self.pending[text] = value
+        self.count += 1
+        if len(self.pending) >= self.write_batch:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.db.executemany("INSERT OR REPLACE INTO entries (k, v) VALUES (?, ?)", self.pending.items())
+            self.db.commit()
+            self.pending = {}
+
+    def close(self):
+        self.db.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class DiskSet:
+    """Set of strings (or tuples of strings) with `in`, add() and len()."""
+
+    def __init__(self, memory_mb=64, temp_dir=None):
+        self._store = _DiskStore(memory_mb, temp_dir)
+
+    def __contains__(self, key):
+        return self._store.lookup(key_text(key))[0]
+
+    def add(self, key):
+        text = key_text(key)
+        if not self._store.lookup(text)[0]:
+            self._store.insert(text)
+
+    def __len__(self):
+        return self._store.count
+
+    def close(self):
+        self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class DiskDict:
+    """String -> string mapping with get(), item assignment and len()."""
+
+    def __init__(self, memory_mb=64, temp_dir=None):
+        self._store = _DiskStore(memory_mb, temp_dir)
+
+    def get(self, key, default=None):
+        found, value = self._store.lookup(key_text(key))
+        return value if found else default
+
+    def __contains__(self, key):
+        return self._store.lookup(key_text(key))[0]
+
+    def __setitem__(self, key, value):
+        text = key_text(key)
+        if self._store.lookup(text)[0]:
+            self._store.count -= 1  # overwriting, not a new key
+        self._store.insert(text, value)
+
+    def __len__(self):
+        return self._store.count
+
+    def close(self):
+        self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def ask_memory_mb():
+    # Prompt used by the interactive normalize-*.py scripts; None (blank
+    # answer) keeps the de-duplication state in memory
+    answer = input("Memory budget in MB for on-disk de-duplication (blank: keep it in memory): ").strip()
+    if not answer:
+        return None
+    try:
+        memory_mb = float(answer)
+    except ValueError:
+        memory_mb = 0
+    if memory_mb <= 0:
+        print(f"Error: invalid memory budget: {answer}")
+        sys.exit(1)
+    return memory_mb
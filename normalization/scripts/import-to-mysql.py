@@ -1,61 +1,647 @@
 from dotenv import load_dotenv
 import os
+import sys
 import csv
+import time
+import hashlib
+import argparse
 import mysql.connector
 
 load_dotenv()  # Load environment variables from .env file
 
-def insert_into_table(csv_path, table_name):
+# Bulk CSV loader. Streams each CSV in chunks through executemany (or hands the
+# whole file to LOAD DATA LOCAL INFILE), with foreign key checks off during the
+# load, and reports rows/sec, duplicates and rejected rows per table.
+#
+#   python normalization/scripts/import-to-mysql.py [--csv-dir DIR] [--tables BOOK AUTHOR ...]
+#                                                   [--method executemany|infile] [--chunk-size N]
+#                                                   [--rebuild-indexes]
+#   python normalization/scripts/import-to-mysql.py --delta [--csv-dir DIR] [--tables ...]
+#
+# executemany loads are checkpointed: the byte offset after each committed
+# batch is saved in IMPORT_CHECKPOINT in the same transaction, so rerunning
+# after an interruption resumes from the last committed batch (--restart
+# ignores the checkpoint).
+#
+# --delta hashes every CSV row and compares it with the fingerprints stored
+# in IMPORT_FINGERPRINT by the previous delta run, then inserts, updates and
+# deletes only the rows that differ. The first delta run fingerprints (and
+# upserts) every row.
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "csv")
+
+# Tables in foreign key dependency order, with the CSV each one is loaded from
+LOAD_ORDER = [
+    ("BOOK", "book.csv"),
+    ("AUTHOR", "author.csv"),
+    ("BOOK_AUTHOR", "book_author.csv"),
+    ("BORROWER", "borrower.csv"),
+]
+
+# Secondary indexes that --rebuild-indexes drops before a load and recreates after it
+SECONDARY_INDEXES = {
+    "BOOK": [("ft_book_title", "FULLTEXT INDEX ft_book_title (Title)"),
+             ("idx_book_added", "INDEX idx_book_added (Added_at)"),
+             ("idx_book_title", "INDEX idx_book_title (Title)")],
+    "AUTHOR": [("ft_author_name", "FULLTEXT INDEX ft_author_name (Name)"),
+               ("idx_author_name", "INDEX idx_author_name (Name)")],
+    "BORROWER": [("idx_borrower_bname", "INDEX idx_borrower_bname (Bname)")],
+}
+
+# Foreign keys checked after the load, since the server skips them during it
+FOREIGN_KEYS = {
+    "BOOK_AUTHOR": [("Isbn", "BOOK"), ("Author_id", "AUTHOR")],
+}
+
+# Primary key columns, used as the row identity in delta imports
+PRIMARY_KEYS = {
+    "BOOK": ["Isbn"],
+    "AUTHOR": ["Author_id"],
+    "BOOK_AUTHOR": ["Author_id", "Isbn"],
+    "BORROWER": ["Card_id"],
+}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Seconds between progress lines during a load
+PROGRESS_INTERVAL = 5.0
+
+# Moves the card_id sequence (ID_SEQUENCE, used by BorrowerManager) past any
+# Card_id loaded from CSV. Never moves it backwards.
+RESYNC_CARD_SEQUENCE_SQL = """
+    UPDATE ID_SEQUENCE
+    SET Next_val = GREATEST(
+        Next_val,
+        (SELECT IFNULL(MAX(CAST(SUBSTRING(Card_id, 3) AS UNSIGNED)), 0) + 1 FROM BORROWER)
+    )
+    WHERE Name = 'card_id'
+"""
+
+# Tables the app's in-process search indexes are built from; loading any of
+# them bumps CATALOG_VERSION so those indexes rebuild
+CATALOG_TABLES = {"BOOK", "AUTHOR", "BOOK_AUTHOR"}
+
+BUMP_CATALOG_VERSION_SQL = """
+    INSERT INTO CATALOG_VERSION (Id, Version) VALUES (1, 1)
+    ON DUPLICATE KEY UPDATE Version = Version + 1
+"""
+
+def connect(local_infile=False):
     # --- configure this for your environment ---
-    conn = mysql.connector.connect(
+    return mysql.connector.connect(
         host=os.environ.get("MYSQL_HOST", "localhost"),
         user=os.environ.get("MYSQL_USER", "root"),
         password=os.environ.get("MYSQL_PASS", "your_password"),
         database=os.environ.get("MYSQL_DB", "LIBMS"),
+        allow_local_infile=local_infile,
     )
+
+class OffsetLines:
+    """
+    Decoded lines of a CSV opened in binary mode, tracking the byte offset
+    just past the last line read. csv.reader pulls one line at a time, so
+    once it returns a row `offset` is where the next row starts.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode("utf-8")
+
+    def seek(self, offset):
+        self.f.seek(offset)
+        self.offset = offset
+
+def read_header(reader):
+    columns = next(reader, None)
+    if not columns:
+        raise ValueError("CSV file must have a header row.")
+    return columns
+
+def read_chunks(reader, columns, chunk_size, stats):
+    # Yields lists of value tuples from a csv.reader; rows with the wrong number
+    # of fields are counted as rejected instead of being inserted
+    chunk = []
+    for row in reader:
+        if not row:
+            continue  # blank line
+        stats["read"] += 1
+        if len(row) != len(columns):
+            stats["rejected"] += 1
+            continue
+        # Keep column order consistent with header, treat empty as NULL
+        chunk.append(tuple(value if value != "" else None for value in row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def get_checkpoint(cursor, table_name):
+    # (file_name, file_size, byte_offset, rows_done) or None
+    cursor.execute("""
+        SELECT File_name, File_size, Byte_offset, Rows_done
+        FROM IMPORT_CHECKPOINT WHERE Table_name = %s
+    """, (table_name,))
+    return cursor.fetchone()
+
+def save_checkpoint(cursor, table_name, file_name, file_size, offset, rows_done):
+    cursor.execute("""
+        INSERT INTO IMPORT_CHECKPOINT (Table_name, File_name, File_size, Byte_offset, Rows_done)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            File_name = VALUES(File_name),
+            File_size = VALUES(File_size),
+            Byte_offset = VALUES(Byte_offset),
+            Rows_done = VALUES(Rows_done)
+    """, (table_name, file_name, file_size, offset, rows_done))
+
+def clear_checkpoint(cursor, table_name):
+    cursor.execute("DELETE FROM IMPORT_CHECKPOINT WHERE Table_name = %s", (table_name,))
+
+def load_executemany(conn, cursor, csv_path, table_name, chunk_size, stats, restart=False):
+    file_name = os.path.basename(csv_path)
+    file_size = os.path.getsize(csv_path)
+
+    with open(csv_path, "rb") as f:
+        lines = OffsetLines(f)
+        reader = csv.reader(lines)
+        columns = read_header(reader)  # header row
+
+        # Resume after the last committed batch if the checkpoint is for this file
+        resumed_rows = 0
+        checkpoint = None if restart else get_checkpoint(cursor, table_name)
+        if checkpoint:
+            name, size, offset, rows_done = checkpoint
+            if name == file_name and size == file_size and lines.offset <= offset <= file_size:
+                lines.seek(offset)
+                resumed_rows = rows_done
+                print(f"[IMPORT] Resuming {table_name} at row {rows_done} "
+                      f"({offset / file_size:.0%} of {file_name})")
+        stats["resumed"] = resumed_rows
+
+        col_list = ", ".join(f"`{col}`" for col in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+
+        # Use INSERT IGNORE so MySQL skips rows that violate constraints
+        # (e.g., duplicate primary/unique keys) instead of throwing an error.
+        sql = f"INSERT IGNORE INTO {table_name} ({col_list}) VALUES ({placeholders})"
+
+        # executemany sends each chunk as one multi-row INSERT; the rows it
+        # reports as affected are the ones that were not duplicates
+        started = last_report = time.perf_counter()
+        for chunk in read_chunks(reader, columns, chunk_size, stats):
+            cursor.executemany(sql, chunk)
+            stats["inserted"] += cursor.rowcount
+            stats["duplicates"] += len(chunk) - cursor.rowcount
+            # The checkpoint commits with the batch, so it never runs ahead of the data
+            save_checkpoint(cursor, table_name, file_name, file_size,
+                            lines.offset, resumed_rows + stats["read"])
+            conn.commit()
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                print(f"[IMPORT] {table_name:<12} {lines.offset / file_size:.0%} "
+                      f"({resumed_rows + stats['read']} rows, "
+                      f"{stats['read'] / (now - started):.0f} rows/s)")
+
+def load_infile(conn, cursor, csv_path, table_name, stats):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = read_header(reader)
+        stats["read"] = sum(1 for row in reader if row)
+
+    # Read every field into a variable so empty strings become NULL and a
+    # trailing \r from Windows line endings is dropped
+    variables = [f"@v{i}" for i in range(len(columns))]
+    assignments = []
+    for i, col in enumerate(columns):
+        value = variables[i]
+        if i == len(columns) - 1:
+            value = f"TRIM(TRAILING '\\r' FROM {value})"
+        assignments.append(f"`{col}` = NULLIF({value}, '')")
+    cursor.execute(f"""
+        LOAD DATA LOCAL INFILE %s
+        IGNORE INTO TABLE {table_name}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        ({", ".join(variables)})
+        SET {", ".join(assignments)}
+    """, (os.path.abspath(csv_path),))
+    stats["inserted"] = cursor.rowcount
+    # The server skips duplicate keys and unparseable rows alike; both are
+    # reported as duplicates here
+    stats["duplicates"] = stats["read"] - cursor.rowcount
+    conn.commit()
+
+def existing_indexes(cursor, table_name):
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table_name,))
+    return {row[0] for row in cursor.fetchall()}
+
+def drop_secondary_indexes(cursor, table_name):
+    # Returns the definitions of the indexes that were dropped
+    present = existing_indexes(cursor, table_name)
+    dropped = []
+    for name, definition in SECONDARY_INDEXES.get(table_name.upper(), []):
+        if name in present:
+            cursor.execute(f"ALTER TABLE {table_name} DROP INDEX {name}")
+            dropped.append(definition)
+    return dropped
+
+def add_indexes(cursor, table_name, definitions):
+    if definitions:
+        cursor.execute(f"ALTER TABLE {table_name} " + ", ".join(f"ADD {d}" for d in definitions))
+
+def count_orphans(cursor, table_name):
+    # [(column, parent_table, orphan_count)] for rows whose parent is missing
+    orphans = []
+    for column, parent in FOREIGN_KEYS.get(table_name.upper(), []):
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM {table_name} c
+            LEFT JOIN {parent} p ON p.{column} = c.{column}
+            WHERE p.{column} IS NULL
+        """)
+        count = cursor.fetchone()[0]
+        if count:
+            orphans.append((column, parent, count))
+    return orphans
+
+def insert_into_table(csv_path, table_name, method="executemany",
+                      chunk_size=DEFAULT_CHUNK_SIZE, rebuild_indexes=False, restart=False):
+    """
+    Loads one CSV into table_name. Returns a stats dict with read, inserted,
+    duplicates, rejected, seconds and rows_per_sec. executemany loads resume
+    from the table's checkpoint unless restart is set.
+    """
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "rejected": 0}
+    conn = connect(local_infile=(method == "infile"))
     cursor = conn.cursor()
+    dropped = []
+    started = time.perf_counter()
 
     try:
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-
-            if reader.fieldnames is None:
-                raise ValueError("CSV file must have a header row.")
-
-            columns = reader.fieldnames  # header row
-            # Build: INSERT INTO table_name (`col1`,`col2`,...) VALUES (%s, %s, ...)
-            col_list = ", ".join(f"`{col}`" for col in columns)
-            placeholders = ", ".join(["%s"] * len(columns))
-
-            # Use INSERT IGNORE so MySQL skips rows that violate constraints 
-            # (e.g., duplicate primary/unique keys) instead of throwing an error.
-            sql = f"INSERT IGNORE INTO {table_name} ({col_list}) VALUES ({placeholders})"
-
-            # Insert each row
-            for row in reader:
-                # Keep column order consistent with header
-                values = [
-                    (row[col] if row[col] != "" else None)  # treat empty as NULL
-                    for col in columns
-                ]
-                cursor.execute(sql, values)
+        # Parents may be loaded after children (or not at all) when --tables is
+        # used, so the server doesn't check FKs row by row; orphans are
+        # counted once the load is done
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        if rebuild_indexes:
+            dropped = drop_secondary_indexes(cursor, table_name)
+
+        if method == "infile":
+            load_infile(conn, cursor, csv_path, table_name, stats)
+        else:
+            load_executemany(conn, cursor, csv_path, table_name, chunk_size, stats, restart)
+
+        if table_name.upper() == "BORROWER":
+            # Keep the card_id sequence ahead of the imported Card_ids so new
+            # borrowers created in the app don't collide with them
+            cursor.execute(RESYNC_CARD_SEQUENCE_SQL)
+        if table_name.upper() in CATALOG_TABLES:
+            cursor.execute(BUMP_CATALOG_VERSION_SQL)
 
+        # The whole file is in, so the next run starts from the beginning
+        clear_checkpoint(cursor, table_name)
         conn.commit()
 
+        add_indexes(cursor, table_name, dropped)
+        dropped = []
+        stats["seconds"] = time.perf_counter() - started
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        stats["orphans"] = count_orphans(cursor, table_name)
+
+    finally:
+        try:
+            # Put back any index dropped before a failed load
+            add_indexes(cursor, table_name, dropped)
+        finally:
+            cursor.close()
+            conn.close()
+
+    stats["rows_per_sec"] = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+def key_positions(columns, table_name):
+    # Indexes of the primary key columns in the CSV header (case-insensitive)
+    lower = [col.lower() for col in columns]
+    return [lower.index(col.lower()) for col in PRIMARY_KEYS[table_name.upper()]]
+
+def row_key(values, positions):
+    return "|".join(values[i] or "" for i in positions)
+
+def row_hash(values):
+    text = "\x1f".join("\\N" if value is None else value for value in values)
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+def stage_fingerprints(cursor, csv_path, table_name, chunk_size, stats):
+    # Loads (key, hash) for every CSV row into a temporary table; returns the header
+    cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS IMPORT_STAGE (
+            Row_key     VARCHAR(64) NOT NULL,
+            Row_hash    CHAR(32) NOT NULL,
+            PRIMARY KEY (Row_key)
+        )
+    """)
+    cursor.execute("DELETE FROM IMPORT_STAGE")
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = read_header(reader)
+        positions = key_positions(columns, table_name)
+
+        for chunk in read_chunks(reader, columns, chunk_size, stats):
+            # Repeated keys keep their first row, like INSERT IGNORE in a full load
+            cursor.executemany(
+                "INSERT IGNORE INTO IMPORT_STAGE (Row_key, Row_hash) VALUES (%s, %s)",
+                [(row_key(values, positions), row_hash(values)) for values in chunk]
+            )
+            stats["duplicates"] += len(chunk) - cursor.rowcount
+    return columns
+
+def diff_fingerprints(cursor, table_name, stats):
+    # Returns ({key: hash} for new/changed rows, [keys] of rows gone from the CSV)
+    cursor.execute("""
+        SELECT s.Row_key, s.Row_hash, f.Row_hash IS NULL AS is_new
+        FROM IMPORT_STAGE s
+        LEFT JOIN IMPORT_FINGERPRINT f
+               ON f.Table_name = %s AND f.Row_key = s.Row_key
+        WHERE f.Row_hash IS NULL OR f.Row_hash <> s.Row_hash
+    """, (table_name,))
+    changed = {}
+    for key, digest, is_new in cursor.fetchall():
+        changed[key] = digest
+        stats["new" if is_new else "changed"] += 1
+
+    cursor.execute("""
+        SELECT f.Row_key
+        FROM IMPORT_FINGERPRINT f
+        LEFT JOIN IMPORT_STAGE s ON s.Row_key = f.Row_key
+        WHERE f.Table_name = %s AND s.Row_key IS NULL
+    """, (table_name,))
+    removed = [row[0] for row in cursor.fetchall()]
+    return changed, removed
+
+def existing_keys(cursor, table_name, keys):
+    # Which of the row keys already have a row in table_name (compared
+    # case-insensitively, like the tables' collation)
+    columns = PRIMARY_KEYS[table_name.upper()]
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    cursor.execute(
+        f"SELECT {', '.join(columns)} FROM {table_name} "
+        f"WHERE ({', '.join(columns)}) IN ({', '.join([row] * len(keys))})",
+        [value for key in keys for value in key.split("|")]
+    )
+    return {"|".join(str(value) for value in found).upper() for found in cursor.fetchall()}
+
+def apply_rows(cursor, sql, rows, stats):
+    # Runs sql for every (params, fingerprint) row; returns the fingerprints of
+    # the rows applied. A row that breaks a unique key (e.g. an Ssn that
+    # belongs to another borrower) is skipped and left for the next run.
+    try:
+        cursor.executemany(sql, [params for params, _ in rows])
+        return [fingerprint for _, fingerprint in rows]
+    except mysql.connector.IntegrityError:
+        applied = []
+        for params, fingerprint in rows:
+            try:
+                cursor.execute(sql, params)
+            except mysql.connector.IntegrityError:
+                stats["conflicts"] += 1
+                continue
+            applied.append(fingerprint)
+        return applied
+
+def upsert_changed(conn, cursor, csv_path, table_name, columns, changed, chunk_size, stats):
+    # Second pass over the CSV sending only the new/changed rows. Rows whose
+    # key exists are updated by primary key and the rest inserted; ON
+    # DUPLICATE KEY UPDATE would also fire on a unique key such as
+    # uk_borrower_ssn and overwrite a different row.
+    positions = key_positions(columns, table_name)
+    key_columns = [columns[i] for i in positions]
+    value_positions = [i for i in range(len(columns)) if i not in positions]
+    col_list = ", ".join(f"`{col}`" for col in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    insert_sql = f"INSERT INTO {table_name} ({col_list}) VALUES ({placeholders})"
+    update_sql = (f"UPDATE {table_name} SET "
+                  + ", ".join(f"`{columns[i]}` = %s" for i in value_positions)
+                  + " WHERE " + " AND ".join(f"`{col}` = %s" for col in key_columns))
+    pending = dict(changed)
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        read_header(reader)
+        scratch = {"read": 0, "rejected": 0}
+        for chunk in read_chunks(reader, columns, chunk_size, scratch):
+            batch = []
+            for values in chunk:
+                key = row_key(values, positions)
+                digest = pending.get(key)
+                if digest is not None and digest == row_hash(values):
+                    del pending[key]
+                    batch.append((values, key, digest))
+            if not batch:
+                continue
+
+            found = existing_keys(cursor, table_name, [key for _, key, _ in batch])
+            inserts = []
+            updates = []
+            fingerprints = []
+            for values, key, digest in batch:
+                fingerprint = (table_name, key, digest)
+                if key.upper() not in found:
+                    inserts.append((values, fingerprint))
+                elif value_positions:
+                    params = [values[i] for i in value_positions] + [values[i] for i in positions]
+                    updates.append((params, fingerprint))
+                else:
+                    # Key-only table (BOOK_AUTHOR): the row is already there
+                    fingerprints.append(fingerprint)
+
+            if updates:
+                fingerprints += apply_rows(cursor, update_sql, updates, stats)
+            if inserts:
+                fingerprints += apply_rows(cursor, insert_sql, inserts, stats)
+            if fingerprints:
+                cursor.executemany("""
+                    INSERT INTO IMPORT_FINGERPRINT (Table_name, Row_key, Row_hash)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE Row_hash = VALUES(Row_hash)
+                """, fingerprints)
+            conn.commit()
+
+def delete_removed(conn, cursor, table_name, keys, stats):
+    # Deletes rows that disappeared from the CSV. FK checks stay on, so rows
+    # still referenced (e.g. a book with loan history) are kept and retried
+    # on the next delta run.
+    columns = PRIMARY_KEYS[table_name.upper()]
+    where = " AND ".join(f"{col} = %s" for col in columns)
+    for key in keys:
+        try:
+            cursor.execute(f"DELETE FROM {table_name} WHERE {where}", key.split("|"))
+        except mysql.connector.IntegrityError:
+            stats["kept"] += 1
+            continue
+        cursor.execute(
+            "DELETE FROM IMPORT_FINGERPRINT WHERE Table_name = %s AND Row_key = %s",
+            (table_name, key)
+        )
+        stats["deleted"] += 1
+    conn.commit()
+
+def delta_import(csv_dir, tables, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Applies only the differences between the CSVs and the last delta import.
+    Upserts run parent-first and deletes child-first. Returns
+    [(table_name, stats)] in load order.
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    results = []
+    removed_by_table = {}
+
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table, filename in tables:
+            started = time.perf_counter()
+            stats = {"read": 0, "new": 0, "changed": 0, "unchanged": 0, "deleted": 0,
+                     "kept": 0, "duplicates": 0, "rejected": 0, "conflicts": 0}
+            path = os.path.join(csv_dir, filename)
+
+            columns = stage_fingerprints(cursor, path, table, chunk_size, stats)
+            changed, removed = diff_fingerprints(cursor, table, stats)
+            stats["unchanged"] = (stats["read"] - stats["rejected"] - stats["duplicates"]
+                                  - stats["new"] - stats["changed"])
+            if changed:
+                upsert_changed(conn, cursor, path, table, columns, changed, chunk_size, stats)
+            if table == "BORROWER":
+                cursor.execute(RESYNC_CARD_SEQUENCE_SQL)
+            if changed and table in CATALOG_TABLES:
+                cursor.execute(BUMP_CATALOG_VERSION_SQL)
+            conn.commit()
+
+            removed_by_table[table] = removed
+            stats["seconds"] = time.perf_counter() - started
+            results.append((table, stats))
+
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        for table, stats in reversed(results):
+            if removed_by_table[table]:
+                started = time.perf_counter()
+                delete_removed(conn, cursor, table, removed_by_table[table], stats)
+                if stats["deleted"] and table in CATALOG_TABLES:
+                    cursor.execute(BUMP_CATALOG_VERSION_SQL)
+                    conn.commit()
+                stats["seconds"] += time.perf_counter() - started
+
+        # Same check as a full load: FKs were off while the rows went in
+        for table, stats in results:
+            stats["orphans"] = count_orphans(cursor, table)
+
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS IMPORT_STAGE")
     finally:
         cursor.close()
         conn.close()
 
+    for _, stats in results:
+        stats["rows_per_sec"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    return results
+
+def print_delta_stats(table_name, stats):
+    print(f"[DELTA]  {table_name:<12} {stats['read']} read, {stats['new']} new, "
+          f"{stats['changed']} changed, {stats['deleted']} deleted, {stats['unchanged']} unchanged "
+          f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/s)")
+    if stats["duplicates"] or stats["rejected"]:
+        print(f"[WARN]   {table_name}: {stats['duplicates']} duplicate key(s), "
+              f"{stats['rejected']} rejected row(s)")
+    if stats["kept"]:
+        print(f"[WARN]   {table_name}: {stats['kept']} removed row(s) kept because other rows reference them")
+    if stats["conflicts"]:
+        print(f"[WARN]   {table_name}: {stats['conflicts']} row(s) skipped because they duplicate "
+              f"a unique value of another row; they are retried on the next run")
+    for column, parent, count in stats.get("orphans", []):
+        print(f"[WARN]   {table_name}.{column}: {count} row(s) reference a missing {parent}")
+
+def print_stats(table_name, stats):
+    if stats.get("resumed"):
+        print(f"[IMPORT] {table_name:<12} resumed after {stats['resumed']} row(s) from an earlier run")
+    print(f"[IMPORT] {table_name:<12} {stats['read']} read, {stats['inserted']} inserted, "
+          f"{stats['duplicates']} duplicate(s), {stats['rejected']} rejected "
+          f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/s)")
+    for column, parent, count in stats.get("orphans", []):
+        print(f"[WARN]   {table_name}.{column}: {count} row(s) reference a missing {parent}")
+
 def main():
-    print("What csv are you inserting into the database?")
-    input_path = input()
-    if os.path.exists(input_path):
-        print("What table is this being inserted into?")
-        table = input()
-        insert_into_table(input_path, table)
+    parser = argparse.ArgumentParser(description="Bulk load the normalized CSVs into MySQL")
+    parser.add_argument("--csv-dir", default=CSV_DIR, help="Directory holding the normalized CSVs")
+    parser.add_argument("--tables", nargs="+", type=str.upper,
+                        choices=[table for table, _ in LOAD_ORDER],
+                        help="Only load these tables (still in dependency order)")
+    parser.add_argument("--method", choices=["executemany", "infile"], default="executemany",
+                        help="executemany (default) or LOAD DATA LOCAL INFILE "
+                             "(needs local_infile enabled on the server)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per executemany batch")
+    parser.add_argument("--rebuild-indexes", action="store_true",
+                        help="Drop secondary indexes during the load and rebuild them afterwards")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore saved checkpoints and load every file from the beginning")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only insert, update and delete rows that changed since the last delta import")
+    args = parser.parse_args()
+
+    selected = set(args.tables) if args.tables else None
+    tables = [(table, filename) for table, filename in LOAD_ORDER
+              if selected is None or table in selected]
+
+    for table, filename in tables:
+        path = os.path.join(args.csv_dir, filename)
+        if not os.path.exists(path):
+            print(f"Path of the provided file is invalid: {path}")
+            sys.exit(1)
+
+    if args.delta:
+        try:
+            results = delta_import(args.csv_dir, tables, max(1, args.chunk_size))
+        except mysql.connector.Error as e:
+            print(f"[DB ERROR] Delta import failed: {e}")
+            sys.exit(1)
+        for table, stats in results:
+            print_delta_stats(table, stats)
+        return
+
+    total_rows = 0
+    total_seconds = 0.0
+
+    for table, filename in tables:
+        path = os.path.join(args.csv_dir, filename)
+        try:
+            stats = insert_into_table(path, table, args.method, max(1, args.chunk_size),
+                                      args.rebuild_indexes, args.restart)
+        except mysql.connector.Error as e:
+            print(f"[DB ERROR] Failed to load {table}: {e}")
+            sys.exit(1)
+
+        print_stats(table, stats)
+        total_rows += stats["inserted"]
+        total_seconds += stats["seconds"]
 
-    else:
-        print("Path of the provided file is invalid.")
+    if total_seconds:
+        print(f"\n{total_rows} row(s) loaded in {total_seconds:.2f}s "
+              f"({total_rows / total_seconds:.0f} rows/s)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,7 +3,10 @@ import os
 import re
 import sys
 
-def normalize_book_authors(input_path, output_path=None):
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from dedup import DiskSet, ask_memory_mb
+
+def normalize_book_authors(input_path, output_path=None, memory_mb=None):
     if not os.path.isfile(input_path):
         print(f"Error: file not found: {input_path}")
         sys.exit(1)
@@ -16,58 +19,63 @@ def normalize_book_authors(input_path, output_path=None):
     # These must match your MySQL column names exactly
     fieldnames = ["Author_id", "Isbn"]
 
-    seen_pairs = set()
+    # With memory_mb set, seen pairs are kept on disk within that budget
+    seen_pairs = DiskSet(memory_mb) if memory_mb else set()
     total_rows = 0
     written_rows = 0
     skipped_dupes = 0
     skipped_empty = 0
 
-    with open(input_path, newline="", encoding="utf-8") as f_in, \
-         open(output_path, "w", newline="", encoding="utf-8") as f_out:
-
-        reader = csv.DictReader(f_in)
-        writer = csv.DictWriter(f_out, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for row in reader:
-            total_rows += 1
-
-            # Try to be flexible with header names
-            raw_author_id = (
-                row.get("Author_id")
-                or row.get("author_id")
-                or row.get("AUTHOR_ID")
-                or row.get("authorId")
-                or ""
-            )
-            raw_isbn = (
-                row.get("Isbn")
-                or row.get("isbn")
-                or row.get("ISBN")
-                or ""
-            )
-
-            author_id = raw_author_id.strip()
-            # Clean ISBN: remove spaces/hyphens and other non-alphanumeric
-            isbn = re.sub(r"[^0-9Xx]", "", raw_isbn).upper().strip()
-
-            # Skip rows with missing key fields
-            if not author_id or not isbn:
-                skipped_empty += 1
-                continue
-
-            key = (author_id, isbn)
-            if key in seen_pairs:
-                skipped_dupes += 1
-                continue
-
-            seen_pairs.add(key)
-
-            writer.writerow({
-                "Author_id": author_id,
-                "Isbn": isbn,
-            })
-            written_rows += 1
+    try:
+        with open(input_path, newline="", encoding="utf-8") as f_in, \
+             open(output_path, "w", newline="", encoding="utf-8") as f_out:
+
+            reader = csv.DictReader(f_in)
+            writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+            writer.writeheader()
+
+            for row in reader:
+                total_rows += 1
+
+                # Try to be flexible with header names
+                raw_author_id = (
+                    row.get("Author_id")
+                    or row.get("author_id")
+                    or row.get("AUTHOR_ID")
+                    or row.get("authorId")
+                    or ""
+                )
+                raw_isbn = (
+                    row.get("Isbn")
+                    or row.get("isbn")
+                    or row.get("ISBN")
+                    or ""
+                )
+
+                author_id = raw_author_id.strip()
+                # Clean ISBN: remove spaces/hyphens and other non-alphanumeric
+                isbn = re.sub(r"[^0-9Xx]", "", raw_isbn).upper().strip()
+
+                # Skip rows with missing key fields
+                if not author_id or not isbn:
+                    skipped_empty += 1
+                    continue
+
+                key = (author_id, isbn)
+                if key in seen_pairs:
+                    skipped_dupes += 1
+                    continue
+
+                seen_pairs.add(key)
+
+                writer.writerow({
+                    "Author_id": author_id,
+                    "Isbn": isbn,
+                })
+                written_rows += 1
+    finally:
+        if memory_mb:
+            seen_pairs.close()
 
     print(f"Input file:        {input_path}")
     print(f"Output file:       {output_path}")
@@ -83,7 +91,7 @@ def main():
         print("No path provided. Exiting.")
         sys.exit(1)
 
-    normalize_book_authors(input_path)
+    normalize_book_authors(input_path, memory_mb=ask_memory_mb())
 
 
 if __name__ == "__main__":
@@ -2,7 +2,10 @@ import csv
 import os
 import sys
 
-def normalize_books(input_path, output_path=None):
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from dedup import DiskSet, ask_memory_mb
+
+def normalize_books(input_path, output_path=None, memory_mb=None):
     if not os.path.isfile(input_path):
         print(f"Error: file not found: {input_path}")
         sys.exit(1)
@@ -36,39 +39,44 @@ def normalize_books(input_path, output_path=None):
         writer = csv.DictWriter(f_out, fieldnames=fieldnames)
         writer.writeheader()
 
-        seen_isbns = set()
+        # With memory_mb set, seen ISBNs are kept on disk within that budget
+        seen_isbns = DiskSet(memory_mb) if memory_mb else set()
         count = 0
         skipped = 0
 
-        for row in reader:
-            # 1. Get Title
-            title = row.get("Title") or row.get("title") or ""
-            title = title.strip()
-
-            # 2. Get ISBN (Prioritize ISBN10)
-            raw_isbn = (row.get("ISBN10") or row.get("isbn10") or 
-                        row.get("ISBN13") or row.get("isbn13") or 
-                        row.get("ISBN") or row.get("isbn") or "")
+        try:
+            for row in reader:
+                # 1. Get Title
+                title = row.get("Title") or row.get("title") or ""
+                title = title.strip()
+
+                # 2. Get ISBN (Prioritize ISBN10)
+                raw_isbn = (row.get("ISBN10") or row.get("isbn10") or 
+                            row.get("ISBN13") or row.get("isbn13") or 
+                            row.get("ISBN") or row.get("isbn") or "")
             
-            # Clean ISBN: remove hyphens, spaces, keep only alphanumeric
-            isbn = "".join(filter(str.isalnum, raw_isbn)).upper()
+                # Clean ISBN: remove hyphens, spaces, keep only alphanumeric
+                isbn = "".join(filter(str.isalnum, raw_isbn)).upper()
             
-            # Truncate to 10 chars if it's long (database Isbn is VARCHAR(10))
-            if len(isbn) > 10:
-                isbn = isbn[:10]
-
-            if isbn and title:
-                if isbn not in seen_isbns:
-                    seen_isbns.add(isbn)
-                    writer.writerow({
-                        "Isbn": isbn,
-                        "Title": title
-                    })
-                    count += 1
+                # Truncate to 10 chars if it's long (database Isbn is VARCHAR(10))
+                if len(isbn) > 10:
+                    isbn = isbn[:10]
+
+                if isbn and title:
+                    if isbn not in seen_isbns:
+                        seen_isbns.add(isbn)
+                        writer.writerow({
+                            "Isbn": isbn,
+                            "Title": title
+                        })
+                        count += 1
+                    else:
+                        skipped += 1
                 else:
                     skipped += 1
-            else:
-                skipped += 1
+        finally:
+            if memory_mb:
+                seen_isbns.close()
 
     print(f"Done! Created '{output_path}'.")
     print(f"Imported: {count} books.")
@@ -78,7 +86,7 @@ def main():
     print("Enter path to raw books file (e.g. normalization/csv/books.csv):")
     path = input().strip()
     if path:
-        normalize_books(path)
+        normalize_books(path, memory_mb=ask_memory_mb())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,270 @@
+import csv
+import io
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from normalize import parse_authors
+from dedup import DiskSet, DiskDict
+
+# Single-pass normalization: reads the raw books file once and writes
+# book.csv, author.csv and book_author.csv together, with the same rules the
+# separate normalize-*.py scripts apply one file at a time.
+#
+#   python normalization/scripts/pipeline.py normalization/csv/books.csv [--output-dir DIR] [--workers N]
+#                                            [--memory-mb MB]
+#
+# or from Python:
+#
+#   from pipeline import run_pipeline
+#   stats = run_pipeline("books.csv", "out/")
+
+BOOK_FIELDS = ["Isbn", "Title"]
+AUTHOR_FIELDS = ["Author_id", "Name", "Fname", "Lname"]
+BOOK_AUTHOR_FIELDS = ["Author_id", "Isbn"]
+
+UNKNOWN_AUTHOR = "Unknown Author"
+
+# With --workers, the input is cut into this many byte ranges per worker so a
+# slow chunk doesn't leave the other processes idle
+CHUNKS_PER_WORKER = 4
+
+
+def book_isbn(row):
+    # Prefer ISBN10; keep only letters/digits and at most 10 characters
+    # (database Isbn is VARCHAR(10))
+    raw_isbn = (row.get("ISBN10") or row.get("isbn10") or
+                row.get("ISBN13") or row.get("isbn13") or
+                row.get("ISBN") or row.get("isbn") or "")
+    return "".join(filter(str.isalnum, raw_isbn)).upper()[:10]
+
+
+def split_name(name):
+    # (Fname, Lname): first and last token, left empty for names with
+    # initials since those can't be split reliably
+    if not name or "." in name:
+        return "", ""
+    parts = name.split()
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[0], parts[-1]
+
+
+def normalize_row(row):
+    """
+    Per-row work with no shared state: returns (isbn, title, [(name, fname, lname)])
+    or None when the row has no ISBN or title.
+    """
+    title = (row.get("Title") or row.get("title") or "").strip()
+    isbn = book_isbn(row)
+    if not isbn or not title:
+        return None
+
+    authors = parse_authors(row.get("Author") or row.get("author") or "")
+    if not authors:
+        authors = [UNKNOWN_AUTHOR]
+    return isbn, title, [(name,) + split_name(name) for name in authors]
+
+
+class Pipeline:
+    """
+    Assigns author IDs in order of first appearance and removes duplicate
+    books and book/author pairs, writing each output row as soon as it is known.
+    The lookup containers default to an in-memory dict/sets; pass DiskDict and
+    DiskSet instances to keep memory bounded on very large feeds.
+    """
+
+    def __init__(self, book_writer, author_writer, book_author_writer,
+                 author_ids=None, seen_isbns=None, seen_pairs=None):
+        self.book_writer = book_writer
+        self.author_writer = author_writer
+        self.book_author_writer = book_author_writer
+        self.author_ids = author_ids if author_ids is not None else {}  # {name: author_id}
+        self.seen_isbns = seen_isbns if seen_isbns is not None else set()
+        self.seen_pairs = seen_pairs if seen_pairs is not None else set()
+        self.stats = {
+            "rows": 0,
+            "books": 0,
+            "authors": 0,
+            "book_authors": 0,
+            "duplicate_isbns": 0,
+            "duplicate_pairs": 0,
+            "skipped": 0,
+        }
+
+    def add(self, record):
+        self.stats["rows"] += 1
+        if record is None:
+            self.stats["skipped"] += 1
+            return
+
+        isbn, title, authors = record
+        if isbn in self.seen_isbns:
+            # Authors of a repeated ISBN still belong to that book
+            self.stats["duplicate_isbns"] += 1
+        else:
+            self.seen_isbns.add(isbn)
+            self.book_writer.writerow([isbn, title])
+            self.stats["books"] += 1
+
+        for name, fname, lname in authors:
+            author_id = self.author_ids.get(name)
+            if author_id is None:
+                author_id = f"A{len(self.author_ids) + 1:04d}"
+                self.author_ids[name] = author_id
+                self.author_writer.writerow([author_id, name, fname, lname])
+                self.stats["authors"] += 1
+
+            pair = (author_id, isbn)
+            if pair in self.seen_pairs:
+                self.stats["duplicate_pairs"] += 1
+                continue
+            self.seen_pairs.add(pair)
+            self.book_author_writer.writerow([author_id, isbn])
+            self.stats["book_authors"] += 1
+
+
+def open_outputs(output_dir, **containers):
+    # Returns ([files], Pipeline) with headers already written
+    os.makedirs(output_dir, exist_ok=True)
+    files = []
+    writers = []
+    for filename, fields in (("book.csv", BOOK_FIELDS),
+                             ("author.csv", AUTHOR_FIELDS),
+                             ("book_author.csv", BOOK_AUTHOR_FIELDS)):
+        f = open(os.path.join(output_dir, filename), "w", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        files.append(f)
+        writers.append(writer)
+    return files, Pipeline(*writers, **containers)
+
+
+def read_header(input_path, delimiter):
+    # Returns (fieldnames, byte offset where the data rows start)
+    with open(input_path, "rb") as f:
+        line = f.readline()
+        header = next(csv.reader([line.decode("utf-8", errors="replace")], delimiter=delimiter))
+        return header, f.tell()
+
+
+def chunk_ranges(input_path, data_start, count):
+    """
+    Splits the data rows into about `count` (start, end) byte ranges, each
+    ending just after a newline. Assumes no quoted field spans lines, which
+    holds for the vendor books files.
+    """
+    size = os.path.getsize(input_path)
+    step = max(1, (size - data_start) // max(1, count))
+    ranges = []
+    with open(input_path, "rb") as f:
+        start = data_start
+        while start < size:
+            f.seek(min(size, start + step))
+            f.readline()  # move the boundary to the end of the current line
+            end = min(size, f.tell())
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def normalize_chunk(task):
+    # Worker: normalizes the rows in one byte range, in file order
+    input_path, start, end, fieldnames, delimiter = task
+    with open(input_path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8", errors="replace")
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames, delimiter=delimiter)
+    return [normalize_row(row) for row in reader]
+
+
+def run_pipeline(input_path, output_dir=".", delimiter="\t", workers=1,
+                 memory_mb=None, temp_dir=None):
+    """
+    Normalizes the raw books file at input_path into book.csv, author.csv and
+    book_author.csv in output_dir. Returns the pipeline stats plus seconds.
+
+    With workers > 1 the per-row work runs in a process pool over byte-range
+    chunks; results are merged in file order, so author IDs and output files
+    are identical to a serial run.
+
+    With memory_mb set, de-duplication state is kept in temporary disk-backed
+    structures (in temp_dir, created if missing) that split that budget
+    between them instead of in memory.
+    """
+    started = time.perf_counter()
+    containers = {}
+    if memory_mb:
+        # One budget for all three stores, not one each
+        share = memory_mb / 3
+        containers = {
+            "author_ids": DiskDict(share, temp_dir),
+            "seen_isbns": DiskSet(share, temp_dir),
+            "seen_pairs": DiskSet(share, temp_dir),
+        }
+    files, pipeline = open_outputs(output_dir, **containers)
+    try:
+        if workers > 1:
+            fieldnames, data_start = read_header(input_path, delimiter)
+            tasks = [(input_path, start, end, fieldnames, delimiter)
+                     for start, end in chunk_ranges(input_path, data_start, workers * CHUNKS_PER_WORKER)]
+            with Pool(workers) as pool:
+                # imap yields chunk results in submission order
+                for records in pool.imap(normalize_chunk, tasks):
+                    for record in records:
+                        pipeline.add(record)
+        else:
+            with open(input_path, newline="", encoding="utf-8", errors="replace") as f_in:
+                for row in csv.DictReader(f_in, delimiter=delimiter):
+                    pipeline.add(normalize_row(row))
+    finally:
+        for f in files:
+            f.close()
+        for container in containers.values():
+            container.close()
+
+    stats = dict(pipeline.stats)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def print_stats(stats):
+    print(f"Rows read:          {stats['rows']}")
+    print(f"Books written:      {stats['books']}")
+    print(f"Authors written:    {stats['authors']}")
+    print(f"Book/author pairs:  {stats['book_authors']}")
+    print(f"Duplicate ISBNs:    {stats['duplicate_isbns']}")
+    print(f"Duplicate pairs:    {stats['duplicate_pairs']}")
+    print(f"Skipped rows:       {stats['skipped']} (no ISBN or title)")
+    print(f"Finished in {stats['seconds']:.2f}s")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Normalize the raw books file into book.csv, author.csv and book_author.csv")
+    parser.add_argument("input", help="Raw books file (e.g. normalization/csv/books.csv)")
+    parser.add_argument("--output-dir", default=".", help="Where to write the normalized CSVs")
+    parser.add_argument("--delimiter", default="\t", help="Input field delimiter (default: tab)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Normalize byte-range chunks in this many processes (default: 1, serial)")
+    parser.add_argument("--memory-mb", type=int,
+                        help="Keep de-duplication state on disk within about this many MB of memory")
+    parser.add_argument("--temp-dir", help="Directory for the on-disk de-duplication files")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.input):
+        print(f"Error: file not found: {args.input}")
+        sys.exit(1)
+
+    print(f"Processing {args.input}...")
+    stats = run_pipeline(args.input, args.output_dir, args.delimiter, max(1, args.workers),
+                         args.memory_mb, args.temp_dir)
+    print_stats(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,11 @@ DROP TABLE IF EXISTS BOOK;
 CREATE TABLE BOOK ( 
 	Isbn	VARCHAR(10) NOT NULL,
 	Title	VARCHAR(255) NOT NULL,
-	CONSTRAINT pk_Book PRIMARY KEY (Isbn)
+	Added_at	TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	CONSTRAINT pk_Book PRIMARY KEY (Isbn),
+	FULLTEXT INDEX ft_book_title (Title),
+	INDEX idx_book_added (Added_at),
+	INDEX idx_book_title (Title)
 );
 
 DROP TABLE IF EXISTS AUTHOR;
@@ -17,7 +21,9 @@ CREATE TABLE AUTHOR (
 	Name		VARCHAR(100) NOT NULL,
 	Fname		VARCHAR(50),
 	Lname		VARCHAR(50),
-	CONSTRAINT pk_author_id PRIMARY KEY (Author_id)
+	CONSTRAINT pk_author_id PRIMARY KEY (Author_id),
+	FULLTEXT INDEX ft_author_name (Name),
+	INDEX idx_author_name (Name)
 );
 
 DROP TABLE IF EXISTS BOOK_AUTHOR;
@@ -42,12 +48,13 @@ CREATE TABLE BORROWER (
 	Address		VARCHAR(100),
 	PhoneNumber	VARCHAR(10),
 	CONSTRAINT pk_borrower PRIMARY KEY (Card_id),
-	CONSTRAINT uk_borrower_ssn UNIQUE (Ssn)
+	CONSTRAINT uk_borrower_ssn UNIQUE (Ssn),
+	INDEX idx_borrower_bname (Bname)
 );
 
 DROP TABLE IF EXISTS LOAN;
 CREATE TABLE LOAN (
-	Loan_id		INT NOT NULL,
+	Loan_id		INT NOT NULL AUTO_INCREMENT,
 	Isbn		VARCHAR(10) NOT NULL,
 	Card_id		VARCHAR(8) NOT NULL,
 	Date_out	DATE NOT NULL,
@@ -55,8 +62,26 @@ CREATE TABLE LOAN (
 	Date_in		DATE,
 	CONSTRAINT pk_loan PRIMARY KEY (Loan_id),
 	CONSTRAINT fk_loan_isbn FOREIGN KEY (Isbn) REFERENCES BOOK(Isbn),
-	CONSTRAINT fk_loan_card_id FOREIGN KEY (Card_id) REFERENCES BORROWER(Card_id)
-	
+	CONSTRAINT fk_loan_card_id FOREIGN KEY (Card_id) REFERENCES BORROWER(Card_id),
+	INDEX idx_loan_card_in (Card_id, Date_in),
+	INDEX idx_loan_isbn_in (Isbn, Date_in),
+	INDEX idx_loan_due (Date_due),
+	INDEX idx_loan_in (Date_in)
+);
+
+-- One row per book that is currently checked out, kept in sync with LOAN
+-- by checkout/check-in so availability is a primary-key lookup
+DROP TABLE IF EXISTS ACTIVE_LOAN;
+CREATE TABLE ACTIVE_LOAN (
+	Isbn		VARCHAR(10) NOT NULL,
+	Loan_id		INT NOT NULL,
+	Card_id		VARCHAR(8) NOT NULL,
+	CONSTRAINT pk_active_loan PRIMARY KEY (Isbn),
+	CONSTRAINT uk_active_loan_id UNIQUE (Loan_id),
+	INDEX idx_active_loan_card (Card_id),
+	CONSTRAINT fk_active_loan_id FOREIGN KEY (Loan_id) REFERENCES LOAN(Loan_id),
+	CONSTRAINT fk_active_loan_isbn FOREIGN KEY (Isbn) REFERENCES BOOK(Isbn),
+	CONSTRAINT fk_active_loan_card_id FOREIGN KEY (Card_id) REFERENCES BORROWER(Card_id)
 );
 
 DROP TABLE IF EXISTS FINE;
@@ -65,5 +90,76 @@ CREATE TABLE FINE (
 	Fine_amt	DECIMAL(8,2) NOT NULL,
 	Paid		BOOLEAN NOT NULL DEFAULT FALSE,
 	CONSTRAINT pk_fine PRIMARY KEY (Loan_id),
-	CONSTRAINT fk_fine_id FOREIGN KEY (Loan_id) REFERENCES LOAN(Loan_id)
-);
\ No newline at end of file
+	CONSTRAINT fk_fine_id FOREIGN KEY (Loan_id) REFERENCES LOAN(Loan_id),
+	INDEX idx_fine_paid (Paid)
+);
+
+DROP TABLE IF EXISTS FINE_WATERMARK;
+CREATE TABLE FINE_WATERMARK (
+	Id			TINYINT NOT NULL DEFAULT 1,
+	Last_run	DATE NOT NULL,
+	CONSTRAINT pk_fine_watermark PRIMARY KEY (Id)
+);
+
+-- Block-allocated ID sequences (see app/db/sequence.py); card_id is
+-- resynced past the highest imported Card_id by the CSV importer
+DROP TABLE IF EXISTS ID_SEQUENCE;
+CREATE TABLE ID_SEQUENCE (
+	Name		VARCHAR(32) NOT NULL,
+	Next_val	BIGINT NOT NULL,
+	CONSTRAINT pk_id_sequence PRIMARY KEY (Name)
+);
+
+INSERT INTO ID_SEQUENCE (Name, Next_val) VALUES ('card_id', 1);
+
+-- Per-row content hashes from the last delta import (import-to-mysql.py --delta)
+DROP TABLE IF EXISTS IMPORT_FINGERPRINT;
+CREATE TABLE IMPORT_FINGERPRINT (
+	Table_name	VARCHAR(64) NOT NULL,
+	Row_key		VARCHAR(64) NOT NULL,
+	Row_hash	CHAR(32) NOT NULL,
+	CONSTRAINT pk_import_fingerprint PRIMARY KEY (Table_name, Row_key)
+);
+
+-- Resume point of an interrupted CSV import (import-to-mysql.py)
+DROP TABLE IF EXISTS IMPORT_CHECKPOINT;
+CREATE TABLE IMPORT_CHECKPOINT (
+	Table_name	VARCHAR(64) NOT NULL,
+	File_name	VARCHAR(255) NOT NULL,
+	File_size	BIGINT NOT NULL,
+	Byte_offset	BIGINT NOT NULL,
+	Rows_done	BIGINT NOT NULL,
+	Updated_at	TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+	CONSTRAINT pk_import_checkpoint PRIMARY KEY (Table_name)
+);
+
+-- Bumped by the CSV importer whenever BOOK, AUTHOR or BOOK_AUTHOR change
+DROP TABLE IF EXISTS CATALOG_VERSION;
+CREATE TABLE CATALOG_VERSION (
+	Id			TINYINT NOT NULL DEFAULT 1,
+	Version		BIGINT NOT NULL,
+	CONSTRAINT pk_catalog_version PRIMARY KEY (Id)
+);
+
+INSERT INTO CATALOG_VERSION (Id, Version) VALUES (1, 0);
+
+-- Migrations already reflected in this file (see app/db/migrate.py)
+DROP TABLE IF EXISTS SCHEMA_VERSION;
+CREATE TABLE SCHEMA_VERSION (
+	Version		INT NOT NULL,
+	Name		VARCHAR(100) NOT NULL,
+	Applied_at	TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	CONSTRAINT pk_schema_version PRIMARY KEY (Version)
+);
+
+INSERT INTO SCHEMA_VERSION (Version, Name) VALUES
+	(1, 'fine_watermark'),
+	(2, 'fulltext_search'),
+	(3, 'active_loan'),
+	(4, 'service_indexes'),
+	(5, 'id_allocation'),
+	(6, 'import_fingerprint'),
+	(7, 'import_checkpoint'),
+	(8, 'book_added_at'),
+	(9, 'field_search_indexes'),
+	(10, 'catalog_version');
@@ -0,0 +1,6 @@
+-- Last successful fines run, used by incremental FinesManager.update_fines()
+CREATE TABLE IF NOT EXISTS FINE_WATERMARK (
+	Id			TINYINT NOT NULL DEFAULT 1,
+	Last_run	DATE NOT NULL,
+	CONSTRAINT pk_fine_watermark PRIMARY KEY (Id)
+);
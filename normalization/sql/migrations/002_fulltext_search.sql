@@ -0,0 +1,3 @@
+-- Word indexes for BookSearchManager fulltext mode
+ALTER TABLE BOOK ADD FULLTEXT INDEX ft_book_title (Title);
+ALTER TABLE AUTHOR ADD FULLTEXT INDEX ft_author_name (Name);
@@ -0,0 +1,15 @@
+-- Denormalized availability: one row per book that is currently checked out
+CREATE TABLE IF NOT EXISTS ACTIVE_LOAN (
+	Isbn		VARCHAR(10) NOT NULL,
+	Loan_id		INT NOT NULL,
+	Card_id		VARCHAR(8) NOT NULL,
+	CONSTRAINT pk_active_loan PRIMARY KEY (Isbn),
+	CONSTRAINT uk_active_loan_id UNIQUE (Loan_id),
+	INDEX idx_active_loan_card (Card_id),
+	CONSTRAINT fk_active_loan_id FOREIGN KEY (Loan_id) REFERENCES LOAN(Loan_id),
+	CONSTRAINT fk_active_loan_isbn FOREIGN KEY (Isbn) REFERENCES BOOK(Isbn),
+	CONSTRAINT fk_active_loan_card_id FOREIGN KEY (Card_id) REFERENCES BORROWER(Card_id)
+);
+
+INSERT IGNORE INTO ACTIVE_LOAN (Isbn, Loan_id, Card_id)
+SELECT Isbn, Loan_id, Card_id FROM LOAN WHERE Date_in IS NULL;
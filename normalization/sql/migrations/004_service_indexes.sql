@@ -0,0 +1,7 @@
+-- Secondary indexes for the predicates used in app/services
+CREATE INDEX idx_loan_card_in ON LOAN (Card_id, Date_in);
+CREATE INDEX idx_loan_isbn_in ON LOAN (Isbn, Date_in);
+CREATE INDEX idx_loan_due ON LOAN (Date_due);
+CREATE INDEX idx_loan_in ON LOAN (Date_in);
+CREATE INDEX idx_fine_paid ON FINE (Paid);
+CREATE INDEX idx_borrower_bname ON BORROWER (Bname);
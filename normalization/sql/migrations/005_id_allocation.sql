@@ -0,0 +1,17 @@
+-- Collision-free ID allocation: AUTO_INCREMENT loan IDs and a sequence table
+-- for card IDs, replacing MAX(...) + 1 lookups
+
+-- FINE and ACTIVE_LOAN reference Loan_id; the column type itself is unchanged
+SET FOREIGN_KEY_CHECKS = 0;
+ALTER TABLE LOAN MODIFY Loan_id INT NOT NULL AUTO_INCREMENT;
+SET FOREIGN_KEY_CHECKS = 1;
+
+CREATE TABLE IF NOT EXISTS ID_SEQUENCE (
+	Name		VARCHAR(32) NOT NULL,
+	Next_val	BIGINT NOT NULL,
+	CONSTRAINT pk_id_sequence PRIMARY KEY (Name)
+);
+
+INSERT IGNORE INTO ID_SEQUENCE (Name, Next_val)
+SELECT 'card_id', IFNULL(MAX(CAST(SUBSTRING(Card_id, 3) AS UNSIGNED)), 0) + 1
+FROM BORROWER;
@@ -0,0 +1,8 @@
+-- Per-row content hashes from the last delta import (import-to-mysql.py --delta),
+-- used to find new, changed and deleted CSV rows without a full reload
+CREATE TABLE IF NOT EXISTS IMPORT_FINGERPRINT (
+	Table_name	VARCHAR(64) NOT NULL,
+	Row_key		VARCHAR(64) NOT NULL,
+	Row_hash	CHAR(32) NOT NULL,
+	CONSTRAINT pk_import_fingerprint PRIMARY KEY (Table_name, Row_key)
+);
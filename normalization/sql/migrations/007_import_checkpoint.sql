@@ -0,0 +1,11 @@
+-- Byte offset of the last committed batch of an interrupted CSV import
+-- (import-to-mysql.py), so a rerun resumes instead of starting over
+CREATE TABLE IF NOT EXISTS IMPORT_CHECKPOINT (
+	Table_name	VARCHAR(64) NOT NULL,
+	File_name	VARCHAR(255) NOT NULL,
+	File_size	BIGINT NOT NULL,
+	Byte_offset	BIGINT NOT NULL,
+	Rows_done	BIGINT NOT NULL,
+	Updated_at	TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+	CONSTRAINT pk_import_checkpoint PRIMARY KEY (Table_name)
+);
@@ -0,0 +1,4 @@
+-- When each book entered the catalog, so in-process indexes (autocomplete)
+-- can pick up newly imported books without reloading every title
+ALTER TABLE BOOK ADD COLUMN Added_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX idx_book_added ON BOOK (Added_at);
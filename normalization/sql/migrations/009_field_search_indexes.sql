@@ -0,0 +1,4 @@
+-- B-tree indexes for the prefix predicates of field-scoped searches
+-- (title:ab, author:ab) when the words are too short for the FULLTEXT indexes
+CREATE INDEX idx_book_title ON BOOK (Title);
+CREATE INDEX idx_author_name ON AUTHOR (Name);
@@ -0,0 +1,9 @@
+-- Counter the CSV importer bumps whenever BOOK, AUTHOR or BOOK_AUTHOR change,
+-- so in-process indexes (autocomplete, trigram search) know to rebuild
+CREATE TABLE IF NOT EXISTS CATALOG_VERSION (
+	Id			TINYINT NOT NULL DEFAULT 1,
+	Version		BIGINT NOT NULL,
+	CONSTRAINT pk_catalog_version PRIMARY KEY (Id)
+);
+
+INSERT IGNORE INTO CATALOG_VERSION (Id, Version) VALUES (1, 0);